@@ -1,135 +1,154 @@
-import json
-import requests
-import pandas as pd
 import plotly.graph_objects as go
-from shapely.geometry import Point
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestRegressor
 from dateutil.relativedelta import relativedelta
 import streamlit as st
-from dotenv import load_dotenv
-import os
+import forecast_engines
+import forecast_features
+import forecast_models
+import hcdp_client
+import memo
+import station_index
+
+# First forecast day; models train on the 36 months before it
+FORECAST_START = datetime(2025, 4, 4)
+# Nearest stations tried, closest first, when looking for one with rainfall history
+NEAREST_STATION_CANDIDATES = 10
+
+def get_training_window(forecast_start=FORECAST_START):
+    """
+    Returns the (train_start, train_end) window used for models forecasting from `forecast_start`.
+    """
+    return forecast_start - relativedelta(months=36), forecast_start - timedelta(days=1)
+
+def fetch_rainfall_windows(station_id, windows):
+    """
+    Fetches a station's daily rainfall for several date windows with one planned download.
 
-# Load environment variables
-load_dotenv()
+    Overlapping windows are merged, the union is fetched once (in concurrent chunks if long),
+    and each window is sliced back out locally.
 
-def generate_rainfall_forecast_plot(month: str, latitude: float, longitude: float):
+    Parameters:
+        station_id (str): HCDP station id
+        windows (dict): Name -> (start, end) datetimes, both inclusive
+
+    Returns:
+        dict: Name -> list of records for that window
     """
-    Generate and display a Plotly chart of actual vs predicted daily rainfall.
-    
+    values = {
+        "station_id": station_id,
+        "datatype": "rainfall",
+        "production": "new",
+        "period": "day",
+        "fill": "partial"
+    }
+    records = hcdp_client.query_date_ranges(values, list(windows.values()))
+    return {
+        name: hcdp_client.slice_records(records, start, end)
+        for name, (start, end) in windows.items()
+    }
+
+def fetch_rainfall_history(station_id, start_date, end_date):
+    """
+    Fetches a station's daily rainfall records between `start_date` and `end_date` (inclusive).
+    """
+    return fetch_rainfall_windows(station_id, {"history": (start_date, end_date)})["history"]
+
+def fit_rainfall_model(train_raw, engine=forecast_engines.DEFAULT_ENGINE, params=None):
+    """
+    Fits a forecast engine on raw daily rainfall records.
+    """
+    df_train = forecast_features.build_training_frame(train_raw)
+    return forecast_engines.create_engine(engine, **(params or {})).fit(df_train)
+
+def train_rainfall_model(station_id, train_start, train_end, engine=forecast_engines.DEFAULT_ENGINE, params=None):
+    """
+    Fetches a station's daily rainfall over the training window and fits a forecast engine.
+
+    Parameters:
+        station_id (str): HCDP station id
+        train_start (datetime): First training day
+        train_end (datetime): Last training day
+        engine (str): Name of the forecast engine (see forecast_engines.ENGINES)
+        params (dict): Engine hyperparameters overriding its defaults
+    """
+    return fit_rainfall_model(fetch_rainfall_history(station_id, train_start, train_end), engine, params)
+
+@memo.memoize("Predictions.forecast", shared=True)
+def get_rainfall_forecast(month: str, latitude: float, longitude: float, engine: str = forecast_engines.DEFAULT_ENGINE):
+    """
+    Computes actual and predicted daily rainfall for the station nearest to a location.
+
     Forecast range: Apr 4, 2025 to end of input month.
     Actuals: Dec 2024 to end of input month.
-    
+
     Parameters:
         month (str): "MM/YYYY" format (e.g., "06/2025")
         latitude (float): Latitude of location
         longitude (float): Longitude of location
-    """
+        engine (str): Forecast engine, e.g. "random_forest", "hist_gradient_boosting" or "climatology"
 
-    hcdp_api_token = os.getenv("OAUTH_TOKEN")
-    if not hcdp_api_token:
-        raise ValueError("OAUTH_TOKEN is not set in the environment")
-    api_base_url = "https://api.hcdp.ikewai.org"
-    header = {"Authorization": f"Bearer {hcdp_api_token}"}
-
-    def query_stations(values, name, limit=10000, offset=0):
-        params = {"name": name}
-        for key in values:
-            params[f"value.{key}"] = values[key]
-        params = {"q": json.dumps(params), "limit": limit, "offset": offset}
-        url = f"{api_base_url}/stations"
-        res = requests.get(url, params=params, headers=header)
-        res.raise_for_status()
-        return [item["value"] for item in res.json()["result"]]
-
-    def get_station_metadata():
-        res = query_stations({}, name="hcdp_station_metadata")
-        return {m[m["id_field"]]: m for m in res}
-
-    def get_closest_station_id(lat, lon, metadata):
-        point = Point(lon, lat)
-        closest_station, min_dist = None, float("inf")
-        for sid, meta in metadata.items():
-            try:
-                station_point = Point(float(meta["lng"]), float(meta["lat"]))
-                dist = point.distance(station_point)
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_station = sid
-            except:
-                continue
-        return closest_station
+    Returns:
+        tuple: (df_actual, df_forecast), or None when only pretrained models are allowed and none exists
+    """
 
     now = datetime(2025, 4, 6)
     target_month = datetime.strptime("01/" + month, "%d/%m/%Y")
-    forecast_start = datetime(2025, 4, 4)
+    forecast_start = FORECAST_START
     forecast_end = (target_month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
 
-    train_start = forecast_start - relativedelta(months=36)
-    train_end = forecast_start - timedelta(days=1)
+    train_start, train_end = get_training_window(forecast_start)
 
     actual_start = datetime(2024, 12, 1)
     actual_end = forecast_end
 
-    metadata = get_station_metadata()
-    station_id = get_closest_station_id(latitude, longitude, metadata)
-    if not station_id:
+    candidates = station_index.get_station_index().nearest(latitude, longitude, k=NEAREST_STATION_CANDIDATES)
+    if not candidates:
         raise ValueError("No nearby station found.")
 
-    values_train = {
-        "station_id": station_id,
-        "datatype": "rainfall",
-        "production": "new",
-        "period": "day",
-        "fill": "partial",
-        "date": {
-            "$gte": train_start.strftime("%Y-%m-%d"),
-            "$lte": train_end.strftime("%Y-%m-%d")
-        }
-    }
-    train_raw = query_stations(values_train, name="hcdp_station_value")
-    df_train = pd.DataFrame([
-        {
-            "date": datetime.strptime(r["date"], "%Y-%m-%d"),
-            "day": datetime.strptime(r["date"], "%Y-%m-%d").day,
-            "month": datetime.strptime(r["date"], "%Y-%m-%d").month,
-            "year": datetime.strptime(r["date"], "%Y-%m-%d").year,
-            "rainfall": float(r["value"])
-        }
-        for r in train_raw if "value" in r
-    ])
-
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(df_train[["day", "month", "year"]], df_train["rainfall"])
-
-    forecast_dates = [forecast_start + timedelta(days=i) for i in range((forecast_end - forecast_start).days + 1)]
-    df_forecast = pd.DataFrame({
-        "date": forecast_dates,
-        "day": [d.day for d in forecast_dates],
-        "month": [d.month for d in forecast_dates],
-        "year": [d.year for d in forecast_dates]
-    })
-    df_forecast["predicted_rainfall"] = model.predict(df_forecast[["day", "month", "year"]])
-
-    values_actual = {
-        "station_id": station_id,
-        "datatype": "rainfall",
-        "production": "new",
-        "period": "day",
-        "fill": "partial",
-        "date": {
-            "$gte": actual_start.strftime("%Y-%m-%d"),
-            "$lte": actual_end.strftime("%Y-%m-%d")
-        }
-    }
-    actual_raw = query_stations(values_actual, name="hcdp_station_value")
-    df_actual = pd.DataFrame([
-        {
-            "date": datetime.strptime(r["date"], "%Y-%m-%d"),
-            "rainfall": float(r["value"])
-        }
-        for r in actual_raw if "value" in r
-    ]).sort_values("date")
+    store = forecast_models.get_model_store()
+    params = forecast_engines.engine_cache_params(forecast_engines.create_engine(engine))
+    # Not every station records rainfall, so walk outward until one has a model or training data
+    for station_id, _ in candidates:
+        # Reuse the trained model for this station/window/engine when it is cached
+        model_key = forecast_models.model_key(station_id, train_start, train_end, params)
+        model = store.get(model_key)
+        if model is None and forecast_models.PRETRAINED_ONLY:
+            continue
+
+        # Training and actuals windows overlap, so fetch their union once and slice locally
+        windows = {"actual": (actual_start, actual_end)}
+        if model is None:
+            windows["train"] = (train_start, train_end)
+        history = fetch_rainfall_windows(station_id, windows)
+
+        if model is None:
+            if not history["train"]:
+                continue
+            model = fit_rainfall_model(history["train"], engine)
+            store.put(model_key, model)
+        break
+    else:
+        if forecast_models.PRETRAINED_ONLY:
+            return None
+        raise ValueError("No nearby station with rainfall history found.")
+
+    df_forecast = forecast_features.build_forecast_frame(forecast_start, forecast_end)
+    df_forecast["predicted_rainfall"] = model.predict(df_forecast)
+
+    df_actual = forecast_features.records_to_frame(history["actual"])
+    return df_actual, df_forecast
+
+def generate_rainfall_forecast_plot(month: str, latitude: float, longitude: float, engine: str = forecast_engines.DEFAULT_ENGINE):
+    """
+    Generate and display a Plotly chart of actual vs predicted daily rainfall.
+
+    Parameters are the same as get_rainfall_forecast.
+    """
+    forecast = get_rainfall_forecast(month, latitude, longitude, engine)
+    if forecast is None:
+        st.warning("No pretrained forecast model is available for this location yet.")
+        return
+    df_actual, df_forecast = forecast
 
     # Plotly Plot
     fig = go.Figure()
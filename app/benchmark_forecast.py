@@ -0,0 +1,129 @@
+"""
+Latency/accuracy benchmark for the forecast engines.
+
+For each station history the last `--holdout-days` days are held out. Every engine is fitted on the rest and
+scored on them. The report gives training time, prediction latency, pickled model size and backtest MAE/RMSE
+averaged over stations.
+
+Usage:
+    python app/benchmark_forecast.py --island Oahu --limit 10 --record histories.csv
+    python app/benchmark_forecast.py --history histories.csv
+"""
+import argparse
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import forecast_engines
+import forecast_features
+
+
+def load_histories(path):
+    """
+    Reads recorded histories from a CSV with `station_id`, `date` and `rainfall` columns.
+    """
+    df = pd.read_csv(path, dtype={"station_id": str}, parse_dates=["date"])
+    return {sid: group[["date", "rainfall"]].sort_values("date", ignore_index=True) for sid, group in df.groupby("station_id")}
+
+
+def fetch_histories(station_ids):
+    import Predictions
+
+    train_start, train_end = Predictions.get_training_window()
+    histories = {}
+    for sid in station_ids:
+        records = Predictions.fetch_rainfall_history(sid, train_start, train_end)
+        if records:
+            histories[sid] = forecast_features.records_to_frame(records)
+    return histories
+
+
+def record_histories(histories, path):
+    frames = [df.assign(station_id=sid) for sid, df in histories.items()]
+    pd.concat(frames, ignore_index=True)[["station_id", "date", "rainfall"]].to_csv(path, index=False)
+
+
+def benchmark_engine(name, history, holdout_days, predict_repeats=5):
+    df = forecast_features.add_calendar_features(history.dropna(subset=["rainfall"]).copy())
+    split = df["date"].max() - pd.Timedelta(days=holdout_days)
+    df_train, df_test = df[df["date"] <= split], df[df["date"] > split]
+    if df_train.empty or df_test.empty:
+        return None
+
+    engine = forecast_engines.create_engine(name)
+    started = time.perf_counter()
+    engine.fit(df_train)
+    train_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(predict_repeats):
+        started = time.perf_counter()
+        predicted = engine.predict(df_test)
+        timings.append(time.perf_counter() - started)
+
+    errors = predicted - df_test["rainfall"].to_numpy()
+    return {
+        "engine": name,
+        "train_s": train_seconds,
+        "predict_ms": float(np.median(timings)) * 1000,
+        "size_kb": len(pickle.dumps(engine)) / 1024,
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+    }
+
+
+def run_benchmark(histories, engines, holdout_days):
+    """
+    Returns a per-engine summary (mean over stations) of the benchmark metrics.
+    """
+    rows = []
+    for sid, history in histories.items():
+        for name in engines:
+            result = benchmark_engine(name, history, holdout_days)
+            if result is not None:
+                rows.append({"station_id": sid, **result})
+    if not rows:
+        return pd.DataFrame()
+    results = pd.DataFrame(rows)
+    summary = results.groupby("engine")[["train_s", "predict_ms", "size_kb", "mae", "rmse"]].mean()
+    summary["stations"] = results.groupby("engine")["station_id"].nunique()
+    return summary.sort_values("mae")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark forecast engines on station rainfall histories.")
+    parser.add_argument("--history", help="CSV of recorded histories (station_id,date,rainfall) instead of fetching")
+    parser.add_argument("--record", help="Write the fetched histories to this CSV for later offline runs")
+    parser.add_argument("--stations", nargs="*", help="Station ids to fetch")
+    parser.add_argument("--island", help="Fetch every station on this island")
+    parser.add_argument("--limit", type=int, default=10, help="Max stations to fetch (default: 10)")
+    parser.add_argument("--holdout-days", type=int, default=90, help="Days held out for the backtest (default: 90)")
+    parser.add_argument(
+        "--engines", nargs="*", default=list(forecast_engines.ENGINES), choices=list(forecast_engines.ENGINES),
+        help="Engines to compare (default: all)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.history:
+        histories = load_histories(args.history)
+    else:
+        station_ids = args.stations
+        if not station_ids:
+            import pretrain_models
+            station_ids = pretrain_models.select_stations(args.island)
+        histories = fetch_histories(station_ids[:args.limit])
+        if args.record:
+            record_histories(histories, args.record)
+
+    if not histories:
+        print("No station histories to benchmark.", file=sys.stderr)
+        return
+    summary = run_benchmark(histories, args.engines, args.holdout_days)
+    print(summary.to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,22 @@
-import json
 import pytz
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
-from shapely.geometry import Point, Polygon
-from dotenv import load_dotenv
-import os
+import islands
+import memo
+import station_cache
+import station_aggregates
+import station_frames
 
-# Load environment variables from .env file
-load_dotenv()
+# Columns of the combined station-day frame
+COMBINED_COLUMNS = ["rainfall", "max-temp", "min-temp", "mean-temp"]
+# Days fetched and converted per step by get_station_data_for_range
+RANGE_BLOCK_DAYS = 366
 
-def get_station_data_for_period(date_input: str, island_name: str, variable: str):
-    """
-    Fetches station-level climate data for a given island, day/month, and variable.
-
-    Parameters:
-    - date_input (str): Either "MM/YYYY" for full month or "MM/DD/YYYY" for a specific day
-    - island_name (str): Name of the island (e.g., "Oahu", "Maui", "Lanai", etc.)
-    - variable (str): Either "max-temp" or "rainfall"
 
-    Returns:
-    - pd.DataFrame: Daily station-level data for the given time and island
+def parse_date_input(date_input: str):
+    """
+    Parses "MM/YYYY" (whole month) or "MM/DD/YYYY" (one day) into an inclusive (start, end) datetime pair.
     """
-
-    # Read the API token from the environment variable
-    hcdp_api_token = os.getenv("OAUTH_TOKEN")
-    if not hcdp_api_token:
-        raise ValueError("OAUTH_TOKEN is not set in the .env file")
-
-    api_base_url = "https://api.hcdp.ikewai.org"
-    header = {"Authorization": f"Bearer {hcdp_api_token}"}
-
-    def query_stations(values, name, limit=10000, offset=0):
-        params = {"name": name}
-        for key in values:
-            params[f"value.{key}"] = values[key]
-        params = {"q": json.dumps(params), "limit": limit, "offset": offset}
-        stations_ep = "/stations"
-        url = f"{api_base_url}{stations_ep}"
-        res = requests.get(url, params=params, headers=header)
-        res.raise_for_status()
-        return [item["value"] for item in res.json()["result"]]
-
-    def get_station_metadata():
-        res = query_stations({}, name="hcdp_station_metadata")
-        return {m[m["id_field"]]: m for m in res}
-
-    def get_station_data(values, metadata=None, limit=10000, offset=0):
-        res = query_stations(values, name="hcdp_station_value", limit=limit, offset=offset)
-        if metadata:
-            return [item | metadata.get(item["station_id"], {}) for item in res]
-        return res
-
-    # Define all island polygons
-    islands = {
-        "Hawaii (Big Island)": Polygon([(-156.1, 18.9), (-154.7, 18.9), (-154.7, 20.3), (-156.1, 20.3)]),
-        "Maui": Polygon([(-156.8, 20.5), (-156.2, 20.5), (-156.2, 21.0), (-156.8, 21.0)]),
-        "Oahu": Polygon([(-158.3, 21.2), (-157.6, 21.2), (-157.6, 21.8), (-158.3, 21.8)]),
-        "Kauai": Polygon([(-159.8, 21.8), (-159.2, 21.8), (-159.2, 22.3), (-159.8, 22.3)]),
-        "Molokai": Polygon([(-157.4, 20.5), (-156.7, 20.5), (-156.7, 21.2), (-157.4, 21.2)]),
-        "Lānai": Polygon([(-157.1, 20.7), (-156.8, 20.7), (-156.8, 21.0), (-157.1, 21.0)]),
-        "Niihau": Polygon([(-160.3, 21.8), (-160.0, 21.8), (-160.0, 22.0), (-160.3, 22.0)]),
-        "Kahoolawe": Polygon([(-156.7, 20.5), (-156.5, 20.5), (-156.5, 20.7), (-156.7, 20.7)])
-    }
-
-    def get_island(lat, lon):
-        point = Point(lon, lat)
-        for name, poly in islands.items():
-            if poly.contains(point):
-                return name
-        return "Unknown or offshore"
-
-    # Normalize island input
-    island_name = island_name.lower()
-    matched_island = None
-    for name in islands.keys():
-        if island_name in name.lower():
-            matched_island = name
-            break
-    if not matched_island:
-        raise ValueError(f"Island '{island_name}' not recognized.")
-
-    # Determine date range
     try:
         if len(date_input) == 7:  # MM/YYYY
             start_date = datetime.strptime("01/" + date_input, "%d/%m/%Y")
@@ -93,77 +28,231 @@ def get_station_data_for_period(date_input: str, island_name: str, variable: str
             raise ValueError("Date input must be in MM/YYYY or MM/DD/YYYY format.")
     except ValueError as e:
         raise ValueError(f"Date parsing failed: {e}")
+    return start_date, end_date
+
 
-    date_list = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
-    metadata = get_station_metadata()
-    records = []
-
-    for date in date_list:
-        date_str = date.strftime("%Y-%m-%d")
-        display_date = date.strftime("%m/%d/%Y")
-        all_station_data = {}
-
-        if variable == "temperature":
-            # for agg in ["max", "min", "mean"]:
-            for agg in ["max"]:
-                values = {
-                    "datatype": "temperature",
-                    "aggregation": agg,
-                    "period": "day",
-                    "date": date_str
-                }
-                data = get_station_data(values, metadata)
-                for item in data:
-                    if not ("lat" in item and "lng" in item): continue
-                    lat, lon = float(item["lat"]), float(item["lng"])
-                    if get_island(lat, lon) != matched_island:
-                        continue
-                    sid = item["station_id"]
-                    if sid not in all_station_data:
-                        all_station_data[sid] = {
-                            "Time": display_date,
-                            "lat": lat,
-                            "lon": lon
-                        }
-                    all_station_data[sid][f"{agg}-temp"] = float(item["value"])
-
-        elif variable == "rainfall":
+def station_queries(variable: str, temperature_aggregations=("max",)):
+    """
+    Returns the (value column, query filter) pairs fetched for a variable.
+
+    Parameters:
+    - variable (str): Either "temperature" or "rainfall"
+    - temperature_aggregations (tuple[str]): Any of "max", "min", "mean"; each becomes a `<agg>-temp` column
+    """
+    queries = []
+    if variable == "temperature":
+        for agg in temperature_aggregations:
             values = {
-                "datatype": "rainfall",
-                "production": "new",
-                "period": "day",
-                "date": date_str
-            }
-            data = get_station_data(values, metadata)
-            for item in data:
-                if not ("lat" in item and "lng" in item): continue
-                lat, lon = float(item["lat"]), float(item["lng"])
-                if get_island(lat, lon) != matched_island:
-                    continue
-                sid = item["station_id"]
-                if sid not in all_station_data:
-                    all_station_data[sid] = {
-                        "Time": display_date,
-                        "lat": lat,
-                        "lon": lon
-                    }
-                all_station_data[sid]["rainfall"] = float(item["value"])
-
-        for station_record in all_station_data.values():
-            row = {
-                "Time": station_record["Time"],
-                "lat": station_record["lat"],
-                "lon": station_record["lon"]
+                "datatype": "temperature",
+                "aggregation": agg,
+                "period": "day"
             }
-            if variable == "max-temp":
-                row["max-temp"] = station_record.get("max-temp")
-                # row["min-temp"] = station_record.get("min-temp")
-                # row["avg-temp"] = station_record.get("mean-temp")
-            elif variable == "rainfall":
-                row["rainfall"] = station_record.get("rainfall")
-            records.append(row)
-
-    df = pd.DataFrame(records)
+            queries.append((f"{agg}-temp", values))
+
+    elif variable == "rainfall":
+        values = {
+            "datatype": "rainfall",
+            "production": "new",
+            "period": "day"
+        }
+        queries.append(("rainfall", values))
+    return queries
+
+
+@memo.memoize("data_function.statewide", ignore=("max_workers",), shared=True)
+def _fetch_statewide_station_data(date_input: str, variable: str, max_workers=None):
+    """
+    Statewide fetch behind get_statewide_station_data, memoized by (date_input, variable).
+
+    Island filtering happens on the cached frame, so the per-island views and the statewide
+    map share one entry per date and variable.
+    """
+
+    start_date, end_date = parse_date_input(date_input)
+    queries = station_queries(variable)
+
+    # Cached dates are served from disk; the rest are fetched as concurrent date-range queries
+    results = station_cache.fetch_station_columns(
+        [values for _, values in queries], start_date, end_date, max_workers=max_workers
+    )
+    # Typed columns are built straight from the results; island comes from the station metadata
+    return station_frames.columns_to_frame(results, [column for column, _ in queries])
+
+
+def get_statewide_station_data(date_input: str, variable: str, island_names=None, max_workers=None):
+    """
+    Fetches station-level climate data for all islands in a single pass.
+
+    Each date is downloaded once statewide and every record is tagged with the
+    island it falls on, so callers that need several islands don't refetch.
+
+    Parameters:
+    - date_input (str): Either "MM/YYYY" for full month or "MM/DD/YYYY" for a specific day
+    - variable (str): Either "temperature" or "rainfall"
+    - island_names (list[str], optional): Only keep stations on these islands
+    - max_workers (int, optional): Max concurrent requests (defaults to hcdp_client.MAX_CONCURRENT_REQUESTS)
+
+    Returns:
+    - pd.DataFrame: Daily station-level data with an `island` column
+    """
+
+    matched_islands = None
+    if island_names is not None:
+        matched_islands = {islands.match_island(name) for name in island_names}
+
+    df = _fetch_statewide_station_data(date_input, variable, max_workers=max_workers)
+    if matched_islands is not None and not df.empty:
+        df = df[df["island"].isin(matched_islands)].reset_index(drop=True)
+    return df
+
+
+@memo.memoize("data_function.combined", ignore=("max_workers",), shared=True)
+def _fetch_combined_station_data(date_input: str, max_workers=None):
+    start_date, end_date = parse_date_input(date_input)
+    queries = station_queries("rainfall") + station_queries("temperature", ("max", "min", "mean"))
+    # All four queries are planned together and fetched concurrently, then outer-joined on (date, station)
+    results = station_cache.fetch_station_columns(
+        [values for _, values in queries], start_date, end_date, max_workers=max_workers
+    )
+    return station_frames.columns_to_frame(results, [column for column, _ in queries])
+
+
+def get_combined_station_data(date_input: str, island_names=None, max_workers=None):
+    """
+    Fetches rainfall and max/min/mean temperature together as one wide station-day frame.
+
+    Parameters:
+    - date_input (str): Either "MM/YYYY" for full month or "MM/DD/YYYY" for a specific day
+    - island_names (list[str], optional): Only keep stations on these islands
+    - max_workers (int, optional): Max concurrent requests
+
+    Returns:
+    - pd.DataFrame: One row per station and day with `rainfall`, `max-temp`, `min-temp` and `mean-temp`
+      columns (NaN where a station doesn't report that variable)
+    """
+    matched_islands = None
+    if island_names is not None:
+        matched_islands = {islands.match_island(name) for name in island_names}
+
+    df = _fetch_combined_station_data(date_input, max_workers=max_workers)
+    if matched_islands is not None and not df.empty:
+        df = df[df["island"].isin(matched_islands)].reset_index(drop=True)
+    return df
+
+
+def summarize_overview(df):
+    """
+    Headline numbers for the General Overview page from a combined station-day frame.
+
+    Rainfall is each station's total over the period and temperatures are each station's mean,
+    averaged over stations.
+
+    Returns:
+    - dict: Column -> value (None when no station reported it)
+    """
+    if df.empty:
+        return {column: None for column in COMBINED_COLUMNS}
+    per_station, _ = station_aggregates.aggregate_by_station(df)
+    summary = {}
+    for column in COMBINED_COLUMNS:
+        value = per_station[column].mean() if column in per_station.columns else None
+        summary[column] = None if value is None or pd.isna(value) else float(value)
+    return summary
+
+
+def get_station_data_for_period(date_input: str, island_name: str, variable: str):
+    """
+    Fetches station-level climate data for a given island, day/month, and variable.
+
+    Parameters:
+    - date_input (str): Either "MM/YYYY" for full month or "MM/DD/YYYY" for a specific day
+    - island_name (str): Name of the island (e.g., "Oahu", "Maui", "Lanai", etc.)
+    - variable (str): Either "temperature" or "rainfall"
+
+    Returns:
+    - pd.DataFrame: Daily station-level data for the given time and island
+    """
+    df = get_statewide_station_data(date_input, variable, island_names=[island_name])
+    if "island" in df.columns:
+        df = df.drop(columns="island")
+    return df
+
+
+def _range_queries(variables):
+    queries = []
+    for variable in variables:
+        if variable == "rainfall":
+            queries += station_queries("rainfall")
+        elif variable.endswith("-temp"):
+            queries += station_queries("temperature", (variable[:-len("-temp")],))
+        else:
+            raise ValueError(f"Unknown variable '{variable}'. Choose from: {', '.join(COMBINED_COLUMNS)}")
+    return queries
+
+
+def iter_station_data_for_range(start, end, island_names=None, variables=None, max_workers=None):
+    """
+    Streams station data for an arbitrary date span, one block of RANGE_BLOCK_DAYS days at a time.
+
+    Each block is looked up in the station cache and its gaps are fetched as concurrent
+    date-range queries, so memory holds one block of raw values rather than the whole span.
+
+    Parameters and columns are the same as get_station_data_for_range.
+
+    Returns:
+    - generator[pd.DataFrame]: Long-format frames in date order
+    """
+    start_date, end_date = pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()
+    if end_date < start_date:
+        raise ValueError("End date must not be before start date.")
+    variables = list(variables or COMBINED_COLUMNS)
+    queries = _range_queries(variables)
+    matched_islands = None
+    if island_names is not None:
+        matched_islands = {islands.match_island(name) for name in island_names}
+    variable_dtype = pd.CategoricalDtype(variables)
+
+    block_start = start_date
+    while block_start <= end_date:
+        block_end = min(block_start + timedelta(days=RANGE_BLOCK_DAYS - 1), end_date)
+        results = station_cache.fetch_station_columns(
+            [values for _, values in queries], block_start, block_end, max_workers=max_workers
+        )
+        df = station_frames.columns_to_frame(results, [column for column, _ in queries])
+        block_start = block_end + timedelta(days=1)
+        if df.empty:
+            continue
+        if matched_islands is not None:
+            df = df[df["island"].isin(matched_islands)]
+        df = df.melt(
+            id_vars=["Time", "station_id", "lat", "lon", "island"], value_vars=variables,
+            var_name="variable", value_name="value"
+        ).dropna(subset=["value"])
+        df["variable"] = df["variable"].astype(variable_dtype)
+        yield df.sort_values("Time", kind="stable", ignore_index=True)
+
+
+def get_station_data_for_range(start, end, island_names=None, variables=None, max_workers=None):
+    """
+    Fetches station data between two dates (spans of many years are fine) as one long-format frame.
+
+    Parameters:
+    - start (str | datetime): First day, inclusive (e.g., "2000-01-01")
+    - end (str | datetime): Last day, inclusive
+    - island_names (list[str], optional): Only keep stations on these islands
+    - variables (list[str], optional): Any of "rainfall", "max-temp", "min-temp", "mean-temp" (default: all)
+    - max_workers (int, optional): Max concurrent requests
+
+    Returns:
+    - pd.DataFrame: One row per station, day and variable with `Time` (datetime64), `station_id`,
+      `island` and `variable` (categoricals), float32 `lat`/`lon` and `value`
+    """
+    frames = list(iter_station_data_for_range(start, end, island_names, variables, max_workers))
+    if not frames:
+        return pd.DataFrame(columns=["Time", "station_id", "lat", "lon", "island", "variable", "value"])
+    df = pd.concat(frames, ignore_index=True)
+    # Blocks have different station categories, so concat falls back to object; re-encode once
+    df["station_id"] = df["station_id"].astype("category")
     return df
 
 
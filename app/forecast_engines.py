@@ -0,0 +1,97 @@
+import abc
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+import forecast_features
+
+
+class ForecastEngine(abc.ABC):
+    """
+    Common interface for rainfall forecasters.
+
+    Engines are fitted on a frame from forecast_features.build_training_frame and predict on a frame from
+    forecast_features.build_forecast_frame. Subclasses must implement fit and predict; an incomplete engine
+    fails when it is created rather than mid-request.
+    """
+
+    name = None
+    default_params = {}
+    features = forecast_features.CALENDAR_FEATURES
+
+    def __init__(self, **params):
+        self.params = {**self.default_params, **params}
+
+    @abc.abstractmethod
+    def fit(self, df_train, target="rainfall"):
+        """
+        Fits the engine on `df_train` and returns it.
+        """
+
+    @abc.abstractmethod
+    def predict(self, df_forecast):
+        """
+        Returns predicted rainfall for each row of `df_forecast`.
+        """
+
+
+class ClimatologyEngine(ForecastEngine):
+    """
+    Predicts the historical mean for the same calendar day, falling back to the month mean and then the overall mean.
+    """
+
+    name = "climatology"
+
+    def fit(self, df_train, target="rainfall"):
+        self.day_means_ = df_train.groupby(["month", "day"])[target].mean()
+        self.month_means_ = df_train.groupby("month")[target].mean()
+        self.overall_mean_ = float(df_train[target].mean())
+        return self
+
+    def predict(self, df_forecast):
+        keys = list(zip(df_forecast["month"], df_forecast["day"]))
+        by_day = self.day_means_.reindex(keys).to_numpy()
+        by_month = self.month_means_.reindex(df_forecast["month"]).to_numpy()
+        return np.where(np.isnan(by_day), np.where(np.isnan(by_month), self.overall_mean_, by_month), by_day)
+
+
+class SklearnEngine(ForecastEngine):
+    estimator_class = None
+
+    def fit(self, df_train, target="rainfall"):
+        self.model_ = self.estimator_class(**self.params)
+        self.model_.fit(df_train[self.features], df_train[target])
+        return self
+
+    def predict(self, df_forecast):
+        return self.model_.predict(df_forecast[self.features])
+
+
+class RandomForestEngine(SklearnEngine):
+    name = "random_forest"
+    estimator_class = RandomForestRegressor
+    default_params = {"n_estimators": 100, "random_state": 42}
+
+
+class HistGradientBoostingEngine(SklearnEngine):
+    name = "hist_gradient_boosting"
+    estimator_class = HistGradientBoostingRegressor
+    default_params = {"max_iter": 200, "learning_rate": 0.05, "random_state": 42}
+    features = forecast_features.CALENDAR_FEATURES + forecast_features.SEASONAL_FEATURES
+
+
+ENGINES = {engine.name: engine for engine in (ClimatologyEngine, RandomForestEngine, HistGradientBoostingEngine)}
+DEFAULT_ENGINE = RandomForestEngine.name
+
+
+def create_engine(name=DEFAULT_ENGINE, **params):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown forecast engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    return ENGINES[name](**params)
+
+
+def engine_cache_params(engine):
+    """
+    Hyperparameters plus engine name and features, used as part of the model cache key.
+    """
+    return {"engine": engine.name, "features": list(engine.features), **engine.params}
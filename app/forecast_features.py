@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Features the rainfall forecast model is trained on
+CALENDAR_FEATURES = ["day", "month", "year"]
+SEASONAL_FEATURES = ["doy_sin", "doy_cos"]
+
+
+def records_to_frame(records, value_column="rainfall"):
+    """
+    Converts HCDP station value records into a date-sorted frame with one `pd.to_datetime` pass.
+
+    Parameters:
+    - records (list[dict]): Records with "date" ("YYYY-MM-DD") and "value" fields
+    - value_column (str): Name for the value column
+
+    Returns:
+    - pd.DataFrame: `date` (datetime64) and float `value_column` columns
+    """
+    records = [r for r in records if "value" in r]
+    df = pd.DataFrame({
+        "date": pd.to_datetime([r["date"] for r in records], format="%Y-%m-%d"),
+        value_column: pd.to_numeric([r["value"] for r in records], errors="coerce").astype("float64"),
+    })
+    return df.sort_values("date", ignore_index=True)
+
+
+def add_calendar_features(df, date_column="date"):
+    """
+    Adds day/month/year and day-of-year sine/cosine columns, computed vectorized from `date_column`.
+    """
+    dates = df[date_column].dt
+    df["day"] = dates.day
+    df["month"] = dates.month
+    df["year"] = dates.year
+    # Seasonal position on the unit circle so Dec 31 and Jan 1 end up next to each other
+    angle = 2 * np.pi * (dates.dayofyear - 1) / np.where(dates.is_leap_year, 366, 365)
+    df["doy_sin"] = np.sin(angle)
+    df["doy_cos"] = np.cos(angle)
+    return df
+
+
+def add_lag_features(df, value_column="rainfall", lags=(1, 7), windows=(7, 30), date_column="date"):
+    """
+    Adds lagged values and trailing rolling means of `value_column`.
+
+    Lags are taken on the daily calendar, so a missing day yields NaN rather than shifting the series.
+    Columns are named `<value>_lag<n>` and `<value>_mean<n>`.
+    """
+    series = df.set_index(date_column)[value_column]
+    series = series[~series.index.duplicated(keep="last")].asfreq("D")
+    for lag in lags:
+        df[f"{value_column}_lag{lag}"] = series.shift(lag).reindex(df[date_column]).to_numpy()
+    for window in windows:
+        rolling = series.shift(1).rolling(window, min_periods=1).mean()
+        df[f"{value_column}_mean{window}"] = rolling.reindex(df[date_column]).to_numpy()
+    return df
+
+
+def build_training_frame(records, value_column="rainfall", lags=(), windows=()):
+    """
+    Records -> frame with calendar features (and lag features if requested), ready for model.fit.
+    """
+    df = add_calendar_features(records_to_frame(records, value_column))
+    if lags or windows:
+        df = add_lag_features(df, value_column, lags=lags, windows=windows)
+    return df
+
+
+def build_forecast_frame(start_date, end_date):
+    """
+    Daily frame from `start_date` to `end_date` (inclusive) with calendar features.
+    """
+    return add_calendar_features(pd.DataFrame({"date": pd.date_range(start_date, end_date, freq="D")}))
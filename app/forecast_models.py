@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+# Directory holding trained forecast models
+MODEL_DIR = os.getenv(
+    "HCDP_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "models")
+)
+# Max models kept on disk; least recently used ones are deleted first (pinned models don't count)
+MAX_MODELS_ON_DISK = int(os.getenv("HCDP_MAX_MODELS_ON_DISK", "500"))
+# Max models kept loaded in memory
+MAX_MODELS_IN_MEMORY = int(os.getenv("HCDP_MAX_MODELS_IN_MEMORY", "16"))
+# Only serve models written by the batch pre-training job; never train inside a page request
+PRETRAINED_ONLY = os.getenv("HCDP_PRETRAINED_MODELS_ONLY", "").lower() in ("1", "true", "yes")
+# Min seconds between touches of a model file served from memory
+TOUCH_INTERVAL = 60
+
+
+def model_key(station_id, train_start, train_end, params):
+    """
+    Builds the cache key for a model trained on one station over one window with the given hyperparameters.
+    """
+    key = {
+        "station_id": str(station_id),
+        "train_start": train_start.strftime("%Y-%m-%d"),
+        "train_end": train_end.strftime("%Y-%m-%d"),
+        "params": params,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ModelStore:
+    """
+    Size-bounded LRU store of trained models, persisted with joblib and loaded lazily.
+
+    Recently used models stay in memory; all models live on disk until evicted.
+    File modification times track recency on disk so eviction survives restarts.
+    Pinned models (the ones pretrain_models writes) live in a `pinned/` subdirectory and are never evicted.
+    """
+
+    def __init__(self, directory=MODEL_DIR, max_on_disk=MAX_MODELS_ON_DISK, max_in_memory=MAX_MODELS_IN_MEMORY):
+        self.directory = directory
+        self.max_on_disk = max_on_disk
+        self.max_in_memory = max_in_memory
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key, pinned=False):
+        directory = os.path.join(self.directory, "pinned") if pinned else self.directory
+        return os.path.join(directory, f"{key}.joblib")
+
+    def _existing_path(self, key):
+        for path in (self._path(key, pinned=True), self._path(key)):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._memory[key] = model
+            self._memory.move_to_end(key)
+            self._touched[key] = time.time()
+            while len(self._memory) > self.max_in_memory:
+                evicted, _ = self._memory.popitem(last=False)
+                self._touched.pop(evicted, None)
+
+    def _touch(self, path):
+        try:
+            # Mark as recently used for disk eviction
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """
+        Returns the model stored under `key`, or None if it isn't cached or can't be loaded.
+        """
+        with self._lock:
+            model = self._memory.get(key)
+            if model is not None:
+                self._memory.move_to_end(key)
+                # Hot models must look recent on disk too, or eviction would delete them first
+                stale = time.time() - self._touched.get(key, 0) >= TOUCH_INTERVAL
+                if stale:
+                    self._touched[key] = time.time()
+        if model is not None:
+            if stale:
+                path = self._existing_path(key)
+                if path is not None:
+                    self._touch(path)
+            return model
+        path = self._existing_path(key)
+        if path is None:
+            return None
+        try:
+            model = joblib.load(path)
+        except Exception:
+            # Truncated, corrupt or written by an incompatible sklearn/joblib; drop it so it gets retrained
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self._touch(path)
+        self._remember(key, model)
+        return model
+
+    def put(self, key, model, pinned=False):
+        """
+        Stores `model` under `key`; pinned models are exempt from the HCDP_MAX_MODELS_ON_DISK bound.
+        """
+        path = self._path(key, pinned)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never load a partial model
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+        self._remember(key, model)
+        if not pinned:
+            self._evict()
+
+    def contains(self, key):
+        """
+        Whether a model for `key` is on disk; the in-memory copy may already have been evicted from there.
+        """
+        return self._existing_path(key) is not None
+
+    def _evict(self):
+        try:
+            entries = [
+                entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".joblib")
+            ]
+        except OSError:
+            return
+        if len(entries) <= self.max_on_disk:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_on_disk]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+_store = ModelStore()
+
+
+def get_model_store():
+    return _store
@@ -0,0 +1,277 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+import json_stream
+
+# Load environment variables from .env file
+load_dotenv()
+
+API_BASE_URL = "https://api.hcdp.ikewai.org"
+STATIONS_ENDPOINT = "/stations"
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 60)
+# Max requests in flight at once for concurrent fetches
+MAX_CONCURRENT_REQUESTS = int(os.getenv("HCDP_MAX_CONCURRENT_REQUESTS", "8"))
+# Max records per /stations page; larger results are paginated
+PAGE_SIZE = 10000
+# Pages requested at once once a result turns out to span several pages
+PARALLEL_PAGES = int(os.getenv("HCDP_PARALLEL_PAGES", "4"))
+# Max keep-alive connections held open to the HCDP host; every concurrent query may page in parallel,
+# so the pool covers MAX_CONCURRENT_REQUESTS * PARALLEL_PAGES requests without dropping connections
+POOL_SIZE = max(16, MAX_CONCURRENT_REQUESTS * max(PARALLEL_PAGES, 1))
+# Days per date-range query; keeps a statewide window to about one page so windows download concurrently
+RANGE_CHUNK_DAYS = 8
+# Days per date-range query for a single station (one record per day, so ten years fits in a page)
+STATION_RANGE_CHUNK_DAYS = 3650
+# Bytes read per step when streaming a response body
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session used for every HCDP request.
+
+    The session keeps TCP/TLS connections alive between calls and retries
+    transient failures (429/5xx) with exponential backoff.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_auth_header():
+    # Read the API token from the environment variable
+    hcdp_api_token = os.getenv("OAUTH_TOKEN")
+    if not hcdp_api_token:
+        raise ValueError("OAUTH_TOKEN is not set in the environment")
+    return {"Authorization": f"Bearer {hcdp_api_token}"}
+
+
+def _iter_page(values, name, limit, offset):
+    # One /stations request, parsed incrementally (see json_stream) so the raw body and the
+    # full parsed document are never held in memory at once
+    params = {"name": name}
+    for key in values:
+        params[f"value.{key}"] = values[key]
+    params = {"q": json.dumps(params), "limit": limit, "offset": offset}
+    url = f"{API_BASE_URL}{STATIONS_ENDPOINT}"
+    with get_session().get(url, params=params, headers=get_auth_header(), timeout=DEFAULT_TIMEOUT, stream=True) as res:
+        res.raise_for_status()
+        for item in json_stream.iter_array_items(res.iter_content(STREAM_CHUNK_SIZE), "result"):
+            yield item["value"]
+
+
+def iter_stations(values, name, limit=PAGE_SIZE, offset=0):
+    """
+    Queries the HCDP /stations endpoint and yields each result's `value` record while the body downloads.
+
+    Results are paginated transparently: a full page means there may be more, so the following
+    offsets are fetched (PARALLEL_PAGES at a time) until a page comes back short.
+
+    Parameters:
+    - values (dict): Filters applied as `value.<key>` in the query
+    - name (str): Collection name (e.g., "hcdp_station_value", "hcdp_station_metadata")
+    - limit (int): Page size
+    - offset (int): Offset of the first page
+
+    Returns:
+    - generator[dict]: The `value` field of each result
+    """
+    count = 0
+    for item in _iter_page(values, name, limit, offset):
+        count += 1
+        yield item
+    if count < limit:
+        return
+    offset += limit
+
+    if PARALLEL_PAGES <= 1:
+        while True:
+            count = 0
+            for item in _iter_page(values, name, limit, offset):
+                count += 1
+                yield item
+            if count < limit:
+                return
+            offset += limit
+
+    # The result is larger than a page, so request the next few pages together
+    with ThreadPoolExecutor(max_workers=PARALLEL_PAGES) as executor:
+        while True:
+            offsets = [offset + i * limit for i in range(PARALLEL_PAGES)]
+            pages = executor.map(lambda page_offset: list(_iter_page(values, name, limit, page_offset)), offsets)
+            for page in pages:
+                yield from page
+                if len(page) < limit:
+                    return
+            offset += limit * PARALLEL_PAGES
+
+
+def query_stations(values, name, limit=PAGE_SIZE, offset=0):
+    """
+    Queries the HCDP /stations endpoint and returns the list of `value` records.
+
+    Parameters are the same as iter_stations.
+    """
+    return list(iter_stations(values, name, limit, offset))
+
+
+def get_station_metadata():
+    res = query_stations({}, name="hcdp_station_metadata")
+    return {m[m["id_field"]]: m for m in res}
+
+
+def get_station_data(values, limit=PAGE_SIZE, offset=0):
+    return query_stations(values, name="hcdp_station_value", limit=limit, offset=offset)
+
+
+def iter_station_data(values, limit=PAGE_SIZE, offset=0):
+    """
+    Streams the station value records matching `values` (see iter_stations).
+    """
+    return iter_stations(values, name="hcdp_station_value", limit=limit, offset=offset)
+
+
+def map_station_data(values_list, consume, max_workers=None):
+    """
+    Streams each query's records into `consume` concurrently, so results are reduced as they download.
+
+    Parameters:
+    - values_list (list[dict]): One filter per request
+    - consume (callable): Called with (values, record iterator); its return value is collected
+    - max_workers (int, optional): Max requests in flight (defaults to MAX_CONCURRENT_REQUESTS)
+
+    Returns:
+    - list: consume's results in the same order as `values_list`
+    """
+    if max_workers is None:
+        max_workers = MAX_CONCURRENT_REQUESTS
+    def run(values):
+        return consume(values, iter_station_data(values))
+
+    if len(values_list) <= 1 or max_workers <= 1:
+        return [run(values) for values in values_list]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(values_list))) as executor:
+        return list(executor.map(run, values_list))
+
+
+def get_station_data_many(values_list, max_workers=None):
+    """
+    Runs get_station_data for every filter in `values_list` concurrently.
+
+    Parameters:
+    - values_list (list[dict]): One filter per request
+    - max_workers (int, optional): Max requests in flight (defaults to MAX_CONCURRENT_REQUESTS)
+
+    Returns:
+    - list[list[dict]]: Results in the same order as `values_list`
+    """
+    if max_workers is None:
+        max_workers = MAX_CONCURRENT_REQUESTS
+    if len(values_list) <= 1 or max_workers <= 1:
+        return [get_station_data(values) for values in values_list]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(values_list))) as executor:
+        return list(executor.map(get_station_data, values_list))
+
+
+def split_date_range(start_date, end_date, chunk_days):
+    """
+    Splits the inclusive range [start_date, end_date] into consecutive windows of at most `chunk_days` days.
+
+    Returns:
+    - list[tuple[datetime, datetime]]: Inclusive (start, end) pairs
+    """
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=chunk_days - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def date_filter(start_date, end_date):
+    """
+    Builds the `date` filter for a query: an exact match for one day, a `$gte`/`$lte` range otherwise.
+    """
+    if start_date == end_date:
+        return start_date.strftime("%Y-%m-%d")
+    return {
+        "$gte": start_date.strftime("%Y-%m-%d"),
+        "$lte": end_date.strftime("%Y-%m-%d")
+    }
+
+
+def merge_date_ranges(ranges):
+    """
+    Merges overlapping or adjacent inclusive (start, end) ranges.
+
+    Returns:
+    - list[tuple[datetime, datetime]]: Disjoint ranges sorted by start
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def query_date_ranges(values, ranges, chunk_days=STATION_RANGE_CHUNK_DAYS, max_workers=None):
+    """
+    Fetches the union of several date ranges once, as concurrent chunks of at most `chunk_days` days.
+
+    Parameters:
+    - values (dict): Query filters without a `date` key
+    - ranges (list[tuple[datetime, datetime]]): Inclusive date ranges, may overlap
+
+    Returns:
+    - list[dict]: Records covering every range, sorted by date, each date/station appearing once
+    """
+    queries = [
+        dict(values, date=date_filter(chunk_start, chunk_end))
+        for start, end in merge_date_ranges(ranges)
+        for chunk_start, chunk_end in split_date_range(start, end, chunk_days)
+    ]
+    records = [item for data in get_station_data_many(queries, max_workers=max_workers) for item in data]
+    return sorted(records, key=lambda item: item["date"])
+
+
+def slice_records(records, start_date, end_date):
+    """
+    Returns the records whose `date` falls in [start_date, end_date].
+    """
+    start_str, end_str = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+    return [item for item in records if start_str <= item["date"] <= end_str]
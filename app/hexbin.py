@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Hexagon radius (center to vertex) in meters, same as the map's HexagonLayer
+HEX_RADIUS_M = 500
+# Meters per degree of latitude, and of longitude at the equator
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LON = 111320.0
+
+
+def _hex_round(q, r):
+    # Round fractional axial coordinates to the nearest hexagon (via cube coordinates)
+    s = -q - r
+    rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_bin(lats, lons, values, radius_m=HEX_RADIUS_M):
+    """
+    Aggregates points into a flat-top hexagon grid of the given radius.
+
+    Coordinates are projected to local meters around the data's mean latitude, so cells are
+    regular hexagons at island scale.
+
+    Parameters:
+    - lats (array-like): Point latitudes
+    - lons (array-like): Point longitudes
+    - values (array-like): Value at each point (NaNs are dropped)
+    - radius_m (float): Hexagon center-to-vertex radius in meters
+
+    Returns:
+    - pd.DataFrame: One row per non-empty cell with center `lat`/`lon` and the cell's
+      `value` (sum, as HexagonLayer would show), `mean`, `count`, `min` and `max`
+    """
+    lats = np.asarray(lats, dtype="float64")
+    lons = np.asarray(lons, dtype="float64")
+    values = np.asarray(values, dtype="float64")
+    keep = ~(np.isnan(lats) | np.isnan(lons) | np.isnan(values))
+    lats, lons, values = lats[keep], lons[keep], values[keep]
+    if len(values) == 0:
+        return pd.DataFrame({name: [] for name in ("lat", "lon", "value", "mean", "count", "min", "max")})
+
+    lat0 = lats.mean()
+    lon_scale = METERS_PER_DEG_LON * np.cos(np.radians(lat0))
+    x = (lons - lons.min()) * lon_scale
+    y = (lats - lats.min()) * METERS_PER_DEG_LAT
+
+    q, r = _hex_round((2.0 / 3.0) * x / radius_m, (-x / 3.0 + np.sqrt(3.0) / 3.0 * y) / radius_m)
+    cells, inverse = np.unique(np.stack([q, r], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=values)
+    # Min/max per cell from one sort: each cell's values end up contiguous and ascending
+    order = np.lexsort((values, inverse))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sorted_values = values[order]
+    mins = sorted_values[starts]
+    maxs = sorted_values[starts + counts - 1]
+
+    center_x = radius_m * 1.5 * cells[:, 0]
+    center_y = radius_m * np.sqrt(3.0) * (cells[:, 1] + cells[:, 0] / 2.0)
+    return pd.DataFrame({
+        "lat": lats.min() + center_y / METERS_PER_DEG_LAT,
+        "lon": lons.min() + center_x / lon_scale,
+        "value": sums,
+        "mean": sums / counts,
+        "count": counts,
+        "min": mins,
+        "max": maxs,
+    })
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+UNKNOWN_ISLAND = "Unknown or offshore"
+
+# Simplified coastline outlines, one GeoJSON Polygon/MultiPolygon feature per island (properties.name)
+BOUNDARIES_PATH = os.getenv(
+    "HCDP_ISLAND_BOUNDARIES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "island_boundaries.geojson")
+)
+# Outlines are grown by this many degrees (~3 km) so shoreline stations still land on their island
+BOUNDARY_BUFFER_DEG = 0.03
+# Points outside every outline go to the nearest island if it is within this many degrees (~11 km)
+NEAREST_ISLAND_MAX_DEG = 0.1
+
+# Bounding boxes (min_lon, min_lat, max_lon, max_lat) the app used before the outlines; points inside one
+# always get the nearest island, so no station the old lookup placed becomes UNKNOWN_ISLAND
+LEGACY_RECTANGLES = {
+    "Hawaii (Big Island)": (-156.1, 18.9, -154.7, 20.3),
+    "Maui": (-156.8, 20.5, -156.2, 21.0),
+    "Oahu": (-158.3, 21.2, -157.6, 21.8),
+    "Kauai": (-159.8, 21.8, -159.2, 22.3),
+    "Molokai": (-157.4, 20.5, -156.7, 21.2),
+    "Lānai": (-157.1, 20.7, -156.8, 21.0),
+    "Niihau": (-160.3, 21.8, -160.0, 22.0),
+    "Kahoolawe": (-156.7, 20.5, -156.5, 20.7),
+}
+
+
+def load_island_polygons(path=BOUNDARIES_PATH, buffer_deg=BOUNDARY_BUFFER_DEG):
+    """
+    Loads island outlines from a GeoJSON FeatureCollection and prepares them for fast point tests.
+
+    Returns:
+    - dict[str, shapely.Geometry]: Island name -> prepared geometry
+    """
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    polygons = {}
+    for feature in features:
+        geom = shape(feature["geometry"])
+        if buffer_deg:
+            geom = geom.buffer(buffer_deg)
+        shapely.prepare(geom)
+        polygons[feature["properties"]["name"]] = geom
+    return polygons
+
+
+def boundaries_fingerprint(path=BOUNDARIES_PATH):
+    """
+    Hash of the outlines file and the lookup settings; it changes whenever assign_islands could answer differently.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read())
+    digest.update(repr((BOUNDARY_BUFFER_DEG, NEAREST_ISLAND_MAX_DEG, sorted(LEGACY_RECTANGLES.items()))).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Define all island polygons
+ISLAND_POLYGONS = load_island_polygons()
+BOUNDARIES_FINGERPRINT = boundaries_fingerprint()
+
+
+def assign_islands(lats, lons):
+    """
+    Vectorized island lookup for arrays of coordinates.
+
+    Parameters:
+    - lats (array-like): Latitudes
+    - lons (array-like): Longitudes
+
+    Returns:
+    - np.ndarray: Island name per point (UNKNOWN_ISLAND when it falls on no island)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    result = np.full(lats.shape, UNKNOWN_ISLAND, dtype=object)
+    unassigned = np.ones(lats.shape, dtype=bool)
+    for name, poly in ISLAND_POLYGONS.items():
+        # First match wins if outlines ever overlap, so the result doesn't depend on later polygons
+        hit = unassigned & shapely.contains_xy(poly, lons, lats)
+        result[hit] = name
+        unassigned &= ~hit
+
+    if unassigned.any():
+        # The outlines are simplified, so some coastal points fall just outside them; use the nearest island
+        points = shapely.points(lons[unassigned], lats[unassigned])
+        names = list(ISLAND_POLYGONS)
+        distances = np.stack([shapely.distance(ISLAND_POLYGONS[name], points) for name in names])
+        nearest = distances.argmin(axis=0)
+        close = (distances.min(axis=0) <= NEAREST_ISLAND_MAX_DEG) | in_legacy_rectangle(
+            lats[unassigned], lons[unassigned]
+        )
+        result[np.flatnonzero(unassigned)[close]] = np.asarray(names, dtype=object)[nearest[close]]
+    return result
+
+
+def in_legacy_rectangle(lats, lons):
+    """
+    Whether each point lies inside one of the LEGACY_RECTANGLES.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    inside = np.zeros(lats.shape, dtype=bool)
+    for min_lon, min_lat, max_lon, max_lat in LEGACY_RECTANGLES.values():
+        inside |= (lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)
+    return inside
+
+
+def check_stations(lats, lons):
+    """
+    Finds points that lie inside one of the LEGACY_RECTANGLES but get no island from assign_islands.
+
+    Returns:
+    - np.ndarray: Indices of the unassigned points (empty when every one is placed)
+    """
+    return np.flatnonzero(in_legacy_rectangle(lats, lons) & (assign_islands(lats, lons) == UNKNOWN_ISLAND))
+
+
+def match_island(island_name):
+    """
+    Normalizes a user-supplied island name (e.g., "oahu", "Hawaii") to its key in ISLAND_POLYGONS.
+    """
+    island_name = island_name.lower()
+    for name in ISLAND_POLYGONS.keys():
+        if island_name in name.lower():
+            return name
+    raise ValueError(f"Island '{island_name}' not recognized.")
+
+
+def main():
+    # Checks every HCDP station plus a grid over the legacy rectangles: python app/islands.py
+    import station_metadata
+
+    frame = station_metadata.get_station_frame()
+    missed = frame.iloc[check_stations(frame["lat"], frame["lon"])]
+    for station_id, row in missed.iterrows():
+        print(f"{station_id}: ({row['lat']:.4f}, {row['lon']:.4f}) is inside a legacy rectangle but on no island", file=sys.stderr)
+    print(f"{len(frame)} stations checked, {len(missed)} unassigned")
+
+    grid_lats, grid_lons = [], []
+    for min_lon, min_lat, max_lon, max_lat in LEGACY_RECTANGLES.values():
+        lat_grid, lon_grid = np.meshgrid(np.linspace(min_lat, max_lat, 50), np.linspace(min_lon, max_lon, 50))
+        grid_lats.append(lat_grid.ravel())
+        grid_lons.append(lon_grid.ravel())
+    grid_missed = check_stations(np.concatenate(grid_lats), np.concatenate(grid_lons))
+    print(f"{sum(len(g) for g in grid_lats)} grid points checked, {len(grid_missed)} unassigned")
+    return 1 if len(missed) or len(grid_missed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import codecs
+import json
+
+# Consumed text is dropped from the buffer once this many characters have piled up
+_COMPACT_AT = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters that can follow a complete value in valid JSON
+_VALUE_END = _WHITESPACE + ",]}:"
+
+
+class _Buffer:
+    """
+    Text buffer over an iterator of byte chunks, refilled on demand.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.done = False
+
+    def fill(self):
+        """
+        Appends the next chunk; returns False once the input is exhausted.
+        """
+        if self.done:
+            return False
+        if self.pos >= _COMPACT_AT:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.text += self._utf8.decode(chunk)
+                return True
+        self.text += self._utf8.decode(b"", final=True)
+        self.done = True
+        return False
+
+    def peek(self):
+        # Next non-whitespace character, or "" at end of input
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed JSON stream: expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decodes the next complete JSON value, reading more input until it is complete.
+
+        A value is only accepted once a delimiter follows it, so a number split across chunks (e.g. "12." + "5")
+        isn't cut short.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                if (end < len(self.text) and self.text[end] in _VALUE_END) or self.done:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            self.fill()
+
+
+def iter_array_items(chunks, key):
+    """
+    Streams the items of the array stored under `key` in a top-level JSON object.
+
+    Other top-level members are decoded and discarded; items are yielded one at a time as soon as
+    their bytes arrive, so memory stays proportional to one item rather than the whole document.
+
+    Parameters:
+    - chunks (iterable[bytes]): The raw body, e.g. `response.iter_content(...)`
+    - key (str): Top-level key holding the array (e.g., "result")
+
+    Returns:
+    - generator: Each decoded array item
+    """
+    buffer = _Buffer(chunks)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        raise ValueError(f"Malformed JSON stream: no '{key}' array")
+    while True:
+        member = buffer.decode()
+        buffer.expect(":")
+        if member == key:
+            break
+        buffer.decode()
+        if buffer.peek() != ",":
+            raise ValueError(f"Malformed JSON stream: no '{key}' array")
+        buffer.pos += 1
+
+    buffer.expect("[")
+    if buffer.peek() == "]":
+        return
+    while True:
+        yield buffer.decode()
+        separator = buffer.peek()
+        buffer.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Malformed JSON stream: expected ',' or ']' at offset {buffer.pos - 1}")
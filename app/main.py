@@ -11,11 +11,17 @@ import pydeck as pdk
 import plotly.express as px
 import plotly.graph_objects as go
 import warnings
+import os
+import uuid
 from streamlit_extras.stylable_container import stylable_container
 import data_function
+import hexbin
+import map_transport
+import memo
+import prefetch
+import station_aggregates
 from vega_datasets import data
 import Predictions
-import temp
 from chat import get_chat_response
 
 # setting page configuration
@@ -88,36 +94,38 @@ elif metric_view == "Monthly":
     st.session_state.date_input = st.sidebar.text_input("Enter Date (MM/YYYY)","12/2016")
     elev_factor = 150
 
+if os.getenv("HCDP_SHOW_CACHE_STATS"):
+    with st.sidebar.expander("Cache stats"):
+        st.dataframe(memo.cache_stats(), hide_index=True)
+
+# Statewide fetches behind each map/chart, used to warm neighbouring dates after the page renders.
+# Data is cached statewide, so warming a date covers every island.
+PREFETCH_FETCHERS = {
+    "Rainfall": [(data_function.get_statewide_station_data, ("rainfall",))],
+    "Temperature": [(data_function.get_statewide_station_data, ("temperature",))],
+    "General Overview": [(data_function.get_combined_station_data, ())],
+}
+if "prefetch_session" not in st.session_state:
+    st.session_state.prefetch_session = uuid.uuid4().hex
+
+# Aggregate map hexagons server-side (set HCDP_SERVER_HEXBIN=0 to let HexagonLayer bin raw rows in the browser)
+SERVER_SIDE_HEXBIN = os.getenv("HCDP_SERVER_HEXBIN", "1") != "0"
+
+# Islands shown on the "All Islands" map
+# (Niihau and Kahoolawe are left out)
+MAP_ISLANDS = ["Oahu", "Kauai", "Molokai", "Lānai", "Maui", "Hawaii (Big Island)"]
+
 def plot_chart(date_input, island_name, variable):
     if island_name == "All" and variable == 'rainfall':
-        chart_data_1 = data_function.get_station_data_for_period(date_input, "Oahu", variable)
-        chart_data_2 = data_function.get_station_data_for_period(date_input, "Kauai", variable)
-        chart_data_3 = data_function.get_station_data_for_period(date_input, "Molokai", variable)
-        chart_data_4 = data_function.get_station_data_for_period(date_input, "Lānai", variable)
-        chart_data_5 = data_function.get_station_data_for_period(date_input, "Maui", variable)
-        chart_data_6 = data_function.get_station_data_for_period(date_input, "Hawaii (Big Island)", variable)
-        # chart_data_7 = data_function.get_station_data_for_period(date_input, "Niihau", variable)
-        # chart_data_8 = data_function.get_station_data_for_period(date_input, "Kahoolawe", variable)
-
-        chart_data = pd.concat([chart_data_1, chart_data_2, chart_data_3, chart_data_4, chart_data_5, chart_data_6], ignore_index=True)
+        chart_data = data_function.get_statewide_station_data(date_input, variable, island_names=MAP_ISLANDS)
     elif island_name != "All" and variable == 'rainfall':
         chart_data = data_function.get_station_data_for_period(date_input, island_name, variable)
     elif island_name == "All" and variable == 'temperature':
-        chart_data_1 = temp.get_station_data_for_period_temp(date_input, "Oahu", variable)
-        chart_data_2 = temp.get_station_data_for_period_temp(date_input, "Kauai", variable)
-        chart_data_3 = temp.get_station_data_for_period_temp(date_input, "Molokai", variable)
-        chart_data_4 = temp.get_station_data_for_period_temp(date_input, "Lānai", variable)
-        chart_data_5 = temp.get_station_data_for_period_temp(date_input, "Maui", variable)
-        chart_data_6 = temp.get_station_data_for_period_temp(date_input, "Hawaii (Big Island)", variable)
-        # chart_data_7 = data_function.get_station_data_for_period(date_input, "Niihau", variable)
-        # chart_data_8 = data_function.get_station_data_for_period(date_input, "Kahoolawe", variable)
-
-        chart_data = pd.concat([chart_data_1, chart_data_2, chart_data_3, chart_data_4, chart_data_5, chart_data_6], ignore_index=True)
-
+        chart_data = data_function.get_statewide_station_data(date_input, variable, island_names=MAP_ISLANDS)
         chart_data = chart_data.rename(columns={"max-temp": "max_temp"})
         value_column = "max_temp"
     elif island_name != "All" and variable == 'temperature':
-        chart_data = temp.get_station_data_for_period_temp(date_input, island_name, variable)
+        chart_data = data_function.get_station_data_for_period(date_input, island_name, variable)
         chart_data = chart_data.rename(columns={"max-temp": "max_temp"})
         value_column = "max_temp"
 
@@ -166,8 +174,66 @@ def plot_chart(date_input, island_name, variable):
     # print(np.min(chart_data[value_column]), np.max(chart_data[value_column]))
     # print(chart_data[value_column].dtype)
 
-    st.pydeck_chart(
-        pdk.Deck(
+    if len(date_input) == 7 and not chart_data.empty:
+        # Monthly view: one row per station (e.g., the month's rainfall total) instead of one per station-day
+        chart_data, _ = station_aggregates.aggregate_by_station(chart_data)
+
+    if SERVER_SIDE_HEXBIN:
+        # Bin on the server so the payload is one row per hexagon instead of one per station-day
+        cells = hexbin.hex_bin(chart_data["lat"], chart_data["lon"], chart_data[value_column], radius_m=500)
+        # Same linear cell-sum -> height mapping HexagonLayer applies with elevation_range
+        cells["elevation"] = np.interp(
+            cells["value"],
+            [cells["value"].min(), cells["value"].max()] if len(cells) else [0, 1],
+            [np.min(chart_data[value_column]), np.max(chart_data[value_column])]
+        )
+        map_data = map_transport.prune_map_data(cells, {
+            "lon": map_transport.COORD_DECIMALS,
+            "lat": map_transport.COORD_DECIMALS,
+            "value": map_transport.VALUE_DECIMALS,
+            "elevation": map_transport.VALUE_DECIMALS,
+            "count": 0,
+            "min": map_transport.VALUE_DECIMALS,
+            "max": map_transport.VALUE_DECIMALS,
+        })
+        layer_type = "ColumnLayer"
+        layer_args = dict(
+            get_position="[lon, lat]",
+            auto_highlight=True,
+            radius=500,
+            disk_resolution=6,
+            elevation_scale=elev_factor,
+            get_elevation="elevation",
+            coverage=1,
+            pickable=True,
+            extruded=True,
+            get_fill_color=color[0],
+        )
+        tooltip_text = f"{variable}: {{value}} {units}\nreadings: {{count}}\nmin: {{min}} max: {{max}}"
+    else:
+        # Only the columns the layer reads are sent (no Time, island, ...)
+        map_data = map_transport.prune_map_data(chart_data, {
+            "lon": map_transport.COORD_DECIMALS,
+            "lat": map_transport.COORD_DECIMALS,
+            value_column: map_transport.VALUE_DECIMALS,
+        })
+        layer_type = "HexagonLayer"
+        layer_args = dict(
+            get_position="[lon, lat]",
+            auto_highlight=True,
+            radius=500,
+            elevation_scale=elev_factor,
+            get_elevation_weight=value_column,
+            elevation_range=[float(np.min(chart_data[value_column])), float(np.max(chart_data[value_column]))],
+            coverage=1,
+            pickable=True,
+            extruded=True,
+            color_range=color,
+        )
+        tooltip_text = f"{variable}: {{elevationValue}} {units}"
+
+    def build_deck(data):
+        return pdk.Deck(
             map_style='mapbox://styles/mapbox/satellite-v9',
             initial_view_state=pdk.ViewState(
                 latitude=lati,
@@ -175,34 +241,34 @@ def plot_chart(date_input, island_name, variable):
                 zoom=zoom,
                 pitch=50,
             ),
-            layers=[
-                pdk.Layer(
-                    "HexagonLayer",
-                    data=chart_data,
-                    get_position="[lon, lat]",
-                    auto_highlight=True,
-                    radius=500,
-                    elevation_scale=elev_factor,
-                    get_elevation_weight=value_column,
-                    elevation_range=[np.min(chart_data[value_column]), np.max(chart_data[value_column])],
-                    coverage=1,
-                    pickable=True,
-                    extruded=True,
-                    color_range=color,
-                ),
-            ],
+            layers=[pdk.Layer(layer_type, data=data, **layer_args)],
             tooltip={
-                "text": f"{variable}: {{elevationValue}} {units}",
+                "text": tooltip_text,
                 "style": {
                     "backgroundColor": "#206af1",
                     "color": "white",
                 },
             },
-        ),
-    )
+        )
+
+    # Reruns with the same data and settings reuse the serialized map instead of rebuilding it
+    settings = (layer_type, repr(sorted(layer_args.items())), tooltip_text, lati, longi, zoom)
+    st.pydeck_chart(map_transport.cached_deck(map_data, build_deck, settings))
 
     
 
+def overview_metrics(island_name):
+    # Real rainfall/temperature figures for the General Overview page, from one combined fetch
+    try:
+        df = data_function.get_combined_station_data(st.session_state.date_input, island_names=[island_name])
+    except (ValueError, requests.RequestException):
+        # Bad dates or an unreachable API leave the metrics as "N/A"
+        df = pd.DataFrame()
+    return data_function.summarize_overview(df)
+
+def format_metric(value, units):
+    return "N/A" if value is None else f"{value:.1f} {units}"
+
 def island_bar_chart(date_input=st.session_state.date_input, variable="rainfall", use_container_width=True):
     # Define islands and retrieve data
     islands = {
@@ -213,29 +279,20 @@ def island_bar_chart(date_input=st.session_state.date_input, variable="rainfall"
         "Hawaiʻi (Big Island)": "Hawaii (Big Island)"
     }
 
+    # One statewide fetch, then split by island (the same memoized frame the "All Islands" map uses)
+    df_all = data_function.get_statewide_station_data(date_input, variable, island_names=list(islands.values()))
+
+    # Per-station values (monthly totals/means in Monthly view), summarized per island in one pass
+    # (temperature keeps each station's hottest day so the bars still show the island's max)
+    _, per_island = station_aggregates.aggregate_by_station(df_all, aggregates={"max-temp": "max"})
+    summary_column = "rainfall_median" if variable == "rainfall" else "max-temp_max"
+
     data = []
     for label, name in islands.items():
-        df = temp.get_station_data_for_period_temp(date_input, name, variable)
-        
         # Skip if no data returned
-        if df.empty:
+        if name not in per_island.index or summary_column not in per_island.columns:
             continue
-            
-        # Rename columns based on variable type
-        if variable == "rainfall":
-            if "rainfall" in df.columns:
-                df = df.rename(columns={"rainfall": "value"})
-                agg_value = df["value"].median()
-            else:
-                continue
-        else:  # temperature
-            if "max-temp" in df.columns:
-                df = df.rename(columns={"max-temp": "value"})
-                agg_value = df["value"].max()
-            else:
-                continue
-        
-        data.append({"Island": label, "value": agg_value})
+        data.append({"Island": label, "value": per_island.loc[name, summary_column]})
 
     df_summary = pd.DataFrame(data)
 
@@ -340,14 +397,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Oahu")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm", "10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C", "2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C", "-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%", "12%")
                     with col5:
@@ -356,11 +414,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:  # monthly metrics
                     with col1:
-                        st.metric("Monthly Precip", "85 mm", "13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C", "5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C", "10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%", "11%")
                     with col5:
@@ -397,14 +455,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Kauai")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm","10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C","2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C","-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%","12%")
                     with col5:
@@ -413,11 +472,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:
                     with col1:
-                        st.metric("Monthly Precip", "85 mm","13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C","5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C","10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%","11%")
                     with col5:
@@ -458,14 +517,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Molokai")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm","10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C","2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C","-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%","12%")
                     with col5:
@@ -474,11 +534,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:
                     with col1:
-                        st.metric("Monthly Precip", "85 mm","13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C","5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C","10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%","11%")
                     with col5:
@@ -519,14 +579,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Lānai")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm","10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C","2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C","-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%","12%")
                     with col5:
@@ -535,11 +596,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:
                     with col1:
-                        st.metric("Monthly Precip", "85 mm","13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C","5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C","10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%","11%")
                     with col5:
@@ -601,14 +662,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Maui")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":   
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm","10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C","2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C","-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%","12%")
                     with col5:
@@ -617,11 +679,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:
                     with col1:
-                        st.metric("Monthly Precip", "85 mm","13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C","5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C","10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%","11%")
                     with col5:
@@ -662,14 +724,15 @@ with main_col:
             ''')
             if st.session_state["display_type"] == "General Overview":
                 # Conditional Metrics Based on View
+                metrics = overview_metrics("Hawaii (Big Island)")
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 if metric_view == "Daily":   
                     with col1:
-                        st.metric("Daily Precip", "3.2 mm","10%")
+                        st.metric("Daily Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Max Temp", "30.1 °C","2%")
+                        st.metric("Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Min Temp", "21.7 °C","-4%")
+                        st.metric("Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Humidity", "75%","12%")
                     with col5:
@@ -678,11 +741,11 @@ with main_col:
                         st.markdown('<div style="background-color:#ffcc00;padding:10px;border-radius:8px;text-align:center;color:black;font-weight:bold;">Fire Warning<br>Low</div>', unsafe_allow_html=True)
                 else:
                     with col1:
-                        st.metric("Monthly Precip", "85 mm","13%")
+                        st.metric("Monthly Precip", format_metric(metrics["rainfall"], "mm"))
                     with col2:
-                        st.metric("Avg Max Temp", "29.5 °C","5%")
+                        st.metric("Avg Max Temp", format_metric(metrics["max-temp"], "°C"))
                     with col3:
-                        st.metric("Avg Min Temp", "22.3 °C","10%")
+                        st.metric("Avg Min Temp", format_metric(metrics["min-temp"], "°C"))
                     with col4:
                         st.metric("Avg Humidity", "77%","11%")
                     with col5:
@@ -829,4 +892,14 @@ with chat_col:
             "Ask about Hawaii climate",
             key="user_prompt",
             on_submit=handle_user_input
-        )
\ No newline at end of file
+        )
+
+# Warm the caches for the previous/next day or month while the user looks at this one
+if st.session_state["display_type"] in PREFETCH_FETCHERS:
+    prefetch.schedule_adjacent(
+        st.session_state.prefetch_session,
+        st.session_state.date_input,
+        PREFETCH_FETCHERS[st.session_state["display_type"]]
+    )
+else:
+    prefetch.cancel(st.session_state.prefetch_session)
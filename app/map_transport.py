@@ -0,0 +1,78 @@
+import hashlib
+import json
+
+import pandas as pd
+import pydeck as pdk
+
+import memo
+
+# Coordinate precision sent to the browser (5 decimals is about 1 m)
+COORD_DECIMALS = 5
+# Precision of map values (mm or °C)
+VALUE_DECIMALS = 2
+
+# Serialized map specs, keyed by data fingerprint and layer settings
+_spec_cache = memo.named_cache("map_transport.deck_json", max_entries=32)
+
+
+def prune_map_data(df, columns):
+    """
+    Keeps only the columns a map layer reads, rounded so the JSON stays short.
+
+    Parameters:
+    - df (pd.DataFrame): Chart data
+    - columns (dict): Column name -> decimals to keep (0 sends integers)
+
+    Returns:
+    - pd.DataFrame: Just those columns
+    """
+    pruned = {}
+    for column, decimals in columns.items():
+        values = df[column].to_numpy(dtype="float64")
+        pruned[column] = values.round().astype("int64") if decimals == 0 else values.round(decimals)
+    return pd.DataFrame(pruned)
+
+
+def fingerprint(df):
+    """
+    Content hash of a DataFrame's columns and values.
+    """
+    digest = hashlib.sha1(repr(list(df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PrebuiltDeck(pdk.Deck):
+    """
+    Deck that returns an already serialized spec from to_json(), which is all st.pydeck_chart reads.
+    """
+
+    def __init__(self, spec, tooltip):
+        super().__init__(tooltip=tooltip)
+        self._spec = spec
+
+    def to_json(self):
+        return self._spec
+
+
+def cached_deck(data, build_deck, settings):
+    """
+    Returns a deck for `data`, reusing the serialized spec from an earlier rerun when the data and settings match.
+
+    Parameters:
+    - data (pd.DataFrame): Pruned layer data (see prune_map_data)
+    - build_deck (callable): Builds the pdk.Deck from `data`; only called on a miss
+    - settings (hashable): Everything else the deck depends on (layer type, styling, view, ...)
+
+    Returns:
+    - pdk.Deck: Deck to pass to st.pydeck_chart
+    """
+    key = (fingerprint(data), settings)
+    hit, entry = _spec_cache.get(key)
+    if not hit:
+        deck = build_deck(data)
+        # pydeck pretty-prints its JSON; re-dump it without the indentation, which is most of the bytes
+        spec = json.dumps(json.loads(deck.to_json()), separators=(",", ":"), ensure_ascii=False)
+        entry = (spec, deck._tooltip)
+        _spec_cache.put(key, entry)
+    return PrebuiltDeck(*entry)
@@ -0,0 +1,223 @@
+import functools
+import inspect
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+import shared_cache
+
+# Defaults for every memoized data function
+MEMO_TTL = int(os.getenv("HCDP_MEMO_TTL", "600"))
+MEMO_MAX_ENTRIES = int(os.getenv("HCDP_MEMO_MAX_ENTRIES", "64"))
+MEMO_MAX_BYTES = int(os.getenv("HCDP_MEMO_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def estimate_size(value):
+    """
+    Approximate in-memory size of a cached value in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _copy(value):
+    # Callers get their own DataFrames so mutating a result can't corrupt the cache
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class MemoCache:
+    """
+    LRU cache with a TTL and both entry-count and byte-size limits, plus hit/miss counters.
+    """
+
+    def __init__(self, name, ttl=MEMO_TTL, max_entries=MEMO_MAX_ENTRIES, max_bytes=MEMO_MAX_BYTES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+        self.joins = 0
+
+    def get(self, key, record=True):
+        """
+        Returns (True, value) on a hit and (False, None) on a miss or expired entry.
+
+        With `record=False` the lookup isn't counted as a hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += record
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += record
+            return False, None
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # Too big to ever fit; don't flush everything else for it
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "shared_hits": self.shared_hits,
+                "joins": self.joins,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+_caches = {}
+
+
+def named_cache(name, ttl=MEMO_TTL, max_entries=MEMO_MAX_ENTRIES, max_bytes=MEMO_MAX_BYTES):
+    """
+    Creates a MemoCache that is reported by cache_stats(), for callers that manage their own keys.
+    """
+    cache = MemoCache(name, ttl, max_entries, max_bytes)
+    _caches[name] = cache
+    return cache
+
+
+def memoize(name, ttl=MEMO_TTL, max_entries=MEMO_MAX_ENTRIES, max_bytes=MEMO_MAX_BYTES, ignore=(), shared=False):
+    """
+    Decorator that caches a function's results by its arguments.
+
+    Parameters:
+    - name (str): Name reported by cache_stats()
+    - ttl (int): Seconds an entry stays valid
+    - max_entries (int): Max cached results
+    - max_bytes (int): Max total estimated size of cached results
+    - ignore (tuple[str]): Argument names left out of the key (e.g., tuning knobs that don't change the result)
+    - shared (bool): Also keep results in shared_cache so other app processes on the host reuse them
+
+    Concurrent misses on the same key run the function once: later callers wait for the first one's result
+    (counted as `joins`) instead of computing it again.
+    """
+    def decorator(func):
+        cache = named_cache(name, ttl, max_entries, max_bytes)
+        signature = inspect.signature(func)
+        in_flight = {}
+        in_flight_lock = threading.Lock()
+
+        def compute(key, args, kwargs):
+            # Another caller may have stored the result between our miss and taking ownership of the key
+            hit, value = cache.get(key, record=False)
+            if not hit and shared and shared_cache.SHARED_CACHE_ENABLED:
+                hit, value = shared_cache.get_shared_cache().get(name, key)
+                if hit:
+                    cache.shared_hits += 1
+                    cache.put(key, value)
+            if not hit:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+                if shared and shared_cache.SHARED_CACHE_ENABLED:
+                    shared_cache.get_shared_cache().put(name, key, value, ttl)
+            return value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((k, _freeze(v)) for k, v in bound.arguments.items() if k not in ignore)
+            hit, value = cache.get(key)
+            if hit:
+                return _copy(value)
+
+            with in_flight_lock:
+                future = in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = in_flight[key] = Future()
+            if not owner:
+                with cache._lock:
+                    cache.joins += 1
+                # Re-raises the first caller's exception if its call failed
+                return _copy(future.result())
+
+            try:
+                value = compute(key, args, kwargs)
+                future.set_result(value)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with in_flight_lock:
+                    del in_flight[key]
+            return _copy(value)
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_stats = cache.stats
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    """
+    Returns the stats of every memoized function as a DataFrame (one row per cache).
+    """
+    return pd.DataFrame([cache.stats() for cache in _caches.values()])
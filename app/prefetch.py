@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+# Days/months on each side of the current selection to warm
+PREFETCH_STEPS = int(os.getenv("HCDP_PREFETCH_STEPS", "1"))
+# Concurrent requests a single prefetch may use (kept low so it doesn't compete with page loads)
+PREFETCH_MAX_WORKERS = int(os.getenv("HCDP_PREFETCH_MAX_WORKERS", "2"))
+# Set HCDP_PREFETCH=0 to turn prefetching off
+PREFETCH_ENABLED = os.getenv("HCDP_PREFETCH", "1") != "0"
+# Nice value for the prefetch thread on Linux
+PREFETCH_NICE = 10
+
+
+def adjacent_dates(date_input, steps=PREFETCH_STEPS):
+    """
+    Returns the neighbouring days (MM/DD/YYYY) or months (MM/YYYY) of `date_input`, nearest first.
+
+    Parameters:
+    - date_input (str): Either "MM/YYYY" or "MM/DD/YYYY"
+    - steps (int): How many days/months on each side
+
+    Returns:
+    - list[str]: Dates in the same format as `date_input`; empty if it doesn't parse
+    """
+    try:
+        if len(date_input) == 7:
+            current, step, fmt = datetime.strptime(date_input, "%m/%Y"), relativedelta(months=1), "%m/%Y"
+        elif len(date_input) == 10:
+            current, step, fmt = datetime.strptime(date_input, "%m/%d/%Y"), timedelta(days=1), "%m/%d/%Y"
+        else:
+            return []
+    except ValueError:
+        return []
+    dates = []
+    for i in range(1, steps + 1):
+        dates.append((current + step * i).strftime(fmt))
+        dates.append((current - step * i).strftime(fmt))
+    return dates
+
+
+class PrefetchScheduler:
+    """
+    Runs cache-warming calls on one low-priority background thread.
+
+    Tasks are grouped per session: scheduling a new batch for a session drops that session's
+    queued tasks, so a changed selection never waits behind stale prefetches.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, session_id, tasks):
+        """
+        Replaces the session's pending prefetches with `tasks`, a list of (func, args, kwargs).
+        """
+        with self._lock:
+            generation = self._generations.get(session_id, 0) + 1
+            self._generations[session_id] = generation
+            for func, args, kwargs in tasks:
+                self._queue.put((session_id, generation, func, args, kwargs))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="hcdp-prefetch", daemon=True)
+                self._thread.start()
+
+    def cancel(self, session_id):
+        with self._lock:
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+
+    def _is_current(self, session_id, generation):
+        with self._lock:
+            return self._generations.get(session_id) == generation
+
+    def _run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICE)
+        except (AttributeError, OSError):
+            # Per-thread priorities are Linux-only
+            pass
+        while True:
+            session_id, generation, func, args, kwargs = self._queue.get()
+            if not self._is_current(session_id, generation):
+                continue
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                # A failed prefetch only means the next page load fetches it itself
+                pass
+
+
+_scheduler = PrefetchScheduler()
+
+
+def schedule_adjacent(session_id, date_input, fetchers):
+    """
+    Warms the caches for the dates next to `date_input` in the background.
+
+    The fetchers must be memo.memoize'd functions called with the same arguments a page load uses (max_workers
+    is left out of their keys), so a page load for a date that is still being prefetched joins that computation
+    instead of downloading it a second time.
+
+    Parameters:
+    - session_id (str): Identifies the user session whose earlier prefetches get cancelled
+    - date_input (str): The date currently shown
+    - fetchers (list[tuple]): (func, args) pairs; each is called as func(date, *args, max_workers=...)
+    """
+    if not PREFETCH_ENABLED:
+        return
+    tasks = [
+        (func, (date, *args), {"max_workers": PREFETCH_MAX_WORKERS})
+        for date in adjacent_dates(date_input)
+        for func, args in fetchers
+    ]
+    _scheduler.schedule(session_id, tasks)
+
+
+def cancel(session_id):
+    _scheduler.cancel(session_id)
@@ -0,0 +1,88 @@
+"""
+Batch pre-training of rainfall forecast models.
+
+Trains a model for every station (or every station on one island) in parallel and writes them to the
+model store that Predictions.py reads at request time.
+
+Usage:
+    python app/pretrain_models.py [--island Oahu] [--workers 4] [--engine random_forest] [--force]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import forecast_engines
+import forecast_models
+import islands
+import station_metadata
+
+
+def _train_station(station_id, engine, force):
+    # Runs in a worker process
+    import Predictions
+
+    store = forecast_models.get_model_store()
+    train_start, train_end = Predictions.get_training_window()
+    params = forecast_engines.engine_cache_params(forecast_engines.create_engine(engine))
+    key = forecast_models.model_key(station_id, train_start, train_end, params)
+    if not force and store.contains(key):
+        return station_id, "cached"
+    model = Predictions.train_rainfall_model(station_id, train_start, train_end, engine)
+    # Pinned so the HCDP_MAX_MODELS_ON_DISK bound never evicts a pretrained model
+    store.put(key, model, pinned=True)
+    return station_id, "trained"
+
+
+def select_stations(island_name=None):
+    """
+    Returns the station ids to train, optionally limited to one island.
+    """
+    frame = station_metadata.get_station_frame()
+    if island_name:
+        frame = frame[frame[station_metadata.ISLAND_FIELD] == islands.match_island(island_name)]
+    return list(frame.index)
+
+
+def pretrain(island_name=None, workers=None, force=False, engine=forecast_engines.DEFAULT_ENGINE):
+    station_ids = select_stations(island_name)
+
+    counts = {"trained": 0, "cached": 0, "failed": 0}
+    started = time.time()
+    # Spawned rather than forked, so workers don't share the parent's pooled HCDP connections or metadata thread
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(_train_station, sid, engine, force): sid for sid in station_ids}
+        for future in as_completed(futures):
+            sid = futures[future]
+            try:
+                _, status = future.result()
+            except Exception as e:
+                # Stations without enough rainfall history can't be trained
+                status = "failed"
+                print(f"{sid}: {e}", file=sys.stderr)
+            counts[status] += 1
+
+    print(
+        f"{len(station_ids)} stations in {time.time() - started:.1f}s: "
+        f"{counts['trained']} trained, {counts['cached']} already cached, {counts['failed']} failed"
+    )
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-train rainfall forecast models for every station.")
+    parser.add_argument("--island", help="Only train stations on this island (e.g., Oahu)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument(
+        "--engine", default=forecast_engines.DEFAULT_ENGINE, choices=list(forecast_engines.ENGINES),
+        help="Forecast engine to train"
+    )
+    parser.add_argument("--force", action="store_true", help="Retrain models that are already in the store")
+    args = parser.parse_args(argv)
+    pretrain(args.island, args.workers, args.force, args.engine)
+
+
+if __name__ == "__main__":
+    main()
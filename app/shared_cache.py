@@ -0,0 +1,101 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+# SQLite file shared by every app process on the host
+SHARED_CACHE_PATH = os.getenv(
+    "HCDP_SHARED_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "shared_results.sqlite")
+)
+# Set HCDP_SHARED_CACHE=0 to keep memoized results in-process only
+SHARED_CACHE_ENABLED = os.getenv("HCDP_SHARED_CACHE", "1") != "0"
+# How long a writer waits for another process's write lock (seconds)
+BUSY_TIMEOUT = 30
+
+
+def open_connection(path):
+    """
+    Opens a SQLite connection that is safe to share between processes.
+
+    WAL mode lets any number of readers run while one process writes, and each write commits atomically.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SharedResultCache:
+    """
+    Cross-process cache of memoized results, stored as zlib-compressed pickles with an expiry time.
+    """
+
+    def __init__(self, path=SHARED_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = open_connection(self.path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (name, key)
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def get(self, name, key):
+        """
+        Returns (True, value) if another process (or this one) stored a live result, else (False, None).
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires_at, payload FROM results WHERE name = ? AND key = ?",
+                (name, self._digest(key)),
+            ).fetchone()
+        if row is None or row[0] < time.time():
+            return False, None
+        try:
+            return True, pickle.loads(zlib.decompress(row[1]))
+        except Exception:
+            # Written by an incompatible version of the app; treat as a miss
+            return False, None
+
+    def put(self, name, key, value, ttl):
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (name, self._digest(key), now + ttl, payload),
+                )
+                conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedResultCache()
+    return _shared_cache
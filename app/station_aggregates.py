@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+
+# How each value column is reduced to one number per station (sum, mean, max, min or median)
+STATION_AGGREGATES = {
+    "rainfall": os.getenv("HCDP_RAINFALL_AGGREGATE", "sum"),
+    "max-temp": os.getenv("HCDP_TEMPERATURE_AGGREGATE", "mean"),
+    "min-temp": os.getenv("HCDP_TEMPERATURE_AGGREGATE", "mean"),
+    "mean-temp": os.getenv("HCDP_TEMPERATURE_AGGREGATE", "mean"),
+}
+# Statistics of the per-station values reported for each island
+ISLAND_STATISTICS = ["median", "mean", "min", "max"]
+
+
+def _aggregate_for(column, aggregates):
+    # main.py renames max-temp to max_temp for pydeck, so look up either spelling
+    return aggregates.get(column, aggregates.get(column.replace("_", "-")))
+
+
+def aggregate_by_station(df, aggregates=None):
+    """
+    Reduces daily station rows to one row per station, plus a per-island summary of those rows.
+
+    Parameters:
+    - df (pd.DataFrame): Daily rows with `station_id`, `lat`, `lon`, value columns and optionally `island`
+    - aggregates (dict, optional): Value column -> aggregate, overriding STATION_AGGREGATES
+
+    Returns:
+    - tuple[pd.DataFrame, pd.DataFrame]: Per-station frame (`station_id`, `lat`, `lon`, `island`, `days` and
+      each value column) and per-island frame indexed by island with `stations` and `<column>_<statistic>`
+      columns (empty when `df` has no `island` column)
+    """
+    aggregates = {**STATION_AGGREGATES, **(aggregates or {})}
+    value_columns = [c for c in df.columns if _aggregate_for(c, aggregates)]
+    if df.empty:
+        return df.iloc[0:0], pd.DataFrame()
+
+    grouped = df.groupby("station_id", observed=True, sort=False)
+    named = {"lat": ("lat", "first"), "lon": ("lon", "first"), "days": ("Time", "nunique")}
+    if "island" in df.columns:
+        named["island"] = ("island", "first")
+    per_station = grouped.agg(**named)
+    for column in value_columns:
+        how = _aggregate_for(column, aggregates)
+        # A station with no readings gets NaN rather than a zero total
+        per_station[column] = grouped[column].sum(min_count=1) if how == "sum" else grouped[column].agg(how)
+    per_station = per_station.reset_index()
+
+    if "island" not in per_station.columns:
+        return per_station, pd.DataFrame()
+    by_island = per_station.groupby("island", observed=True)
+    per_island = by_island[value_columns].agg(ISLAND_STATISTICS)
+    per_island.columns = [f"{column}_{statistic}" for column, statistic in per_island.columns]
+    per_island.insert(0, "stations", by_island.size())
+    return per_station, per_island
@@ -0,0 +1,242 @@
+import bisect
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import hcdp_client
+import shared_cache
+
+# SQLite file holding cached daily station values
+CACHE_PATH = os.getenv(
+    "HCDP_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "station_values.sqlite")
+)
+# Dates newer than this many days may still be published or revised upstream (HCDP lags by several weeks)
+RECENT_DAYS = int(os.getenv("HCDP_CACHE_RECENT_DAYS", "60"))
+# How long a recent or incomplete date stays cached (seconds); older complete dates never expire
+RECENT_TTL = int(os.getenv("HCDP_CACHE_RECENT_TTL", "3600"))
+# A date is complete when it has at least this fraction of the most stations any date within
+# COMPLETE_WINDOW_DAYS of it has; empty and short dates are refetched after RECENT_TTL however old they are
+COMPLETE_FRACTION = float(os.getenv("HCDP_CACHE_COMPLETE_FRACTION", "0.5"))
+COMPLETE_WINDOW_DAYS = 30
+
+# Filter fields that make up the cache key (besides the date)
+KEY_FIELDS = ("datatype", "aggregation", "production", "period")
+
+
+class StationValueCache:
+    """
+    Persistent cache of daily station values, one row per (datatype, aggregation, production, period, date).
+
+    Each row stores the day's station ids and values as zlib-compressed JSON columns, plus the station count
+    used to tell complete days from ones HCDP hadn't fully published yet.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            # WAL mode so several app processes can read while one of them writes
+            self._conn = shared_cache.open_connection(self.path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS station_values (
+                    datatype TEXT NOT NULL,
+                    aggregation TEXT NOT NULL,
+                    production TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    payload BLOB NOT NULL,
+                    stations INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (datatype, aggregation, production, period, date)
+                )
+                """
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(station_values)")]
+            if "stations" not in columns:
+                # Rows from before the count was stored read as empty, so they're refetched once
+                self._conn.execute("ALTER TABLE station_values ADD COLUMN stations INTEGER NOT NULL DEFAULT 0")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _key(values):
+        return tuple(str(values.get(field, "")) for field in KEY_FIELDS)
+
+    @staticmethod
+    def _is_fresh(date_str, fetched_at, stations, reference, now):
+        recent_cutoff = (datetime.fromtimestamp(now) - timedelta(days=RECENT_DAYS)).strftime("%Y-%m-%d")
+        complete = stations > 0 and stations >= COMPLETE_FRACTION * reference
+        if date_str < recent_cutoff and complete:
+            return True
+        return now - fetched_at < RECENT_TTL
+
+    def get_many(self, values, dates):
+        """
+        Looks up cached values for each date.
+
+        Returns:
+        - dict[str, dict]: {"station_id": [...], "value": [...]} for every date that is cached and still fresh
+        """
+        if not dates:
+            return {}
+        key = self._key(values)
+        now = time.time()
+        hits = {}
+        window = timedelta(days=COMPLETE_WINDOW_DAYS)
+        with self._lock:
+            conn = self._connect()
+            placeholders = ",".join("?" * len(dates))
+            rows = conn.execute(
+                f"""
+                SELECT date, fetched_at, stations, payload FROM station_values
+                WHERE datatype = ? AND aggregation = ? AND production = ? AND period = ?
+                AND date IN ({placeholders})
+                """,
+                (*key, *dates),
+            ).fetchall()
+            # Station counts of the surrounding dates, to judge whether each cached date is complete
+            counts = conn.execute(
+                """
+                SELECT date, stations FROM station_values
+                WHERE datatype = ? AND aggregation = ? AND production = ? AND period = ?
+                AND date BETWEEN ? AND ? ORDER BY date
+                """,
+                (
+                    *key,
+                    (datetime.strptime(min(dates), "%Y-%m-%d") - window).strftime("%Y-%m-%d"),
+                    (datetime.strptime(max(dates), "%Y-%m-%d") + window).strftime("%Y-%m-%d"),
+                ),
+            ).fetchall()
+        count_dates = [date_str for date_str, _ in counts]
+        for date_str, fetched_at, stations, payload in rows:
+            day = datetime.strptime(date_str, "%Y-%m-%d")
+            lo = bisect.bisect_left(count_dates, (day - window).strftime("%Y-%m-%d"))
+            hi = bisect.bisect_right(count_dates, (day + window).strftime("%Y-%m-%d"))
+            reference = max(count for _, count in counts[lo:hi])
+            if not self._is_fresh(date_str, fetched_at, stations, reference, now):
+                continue
+            hits[date_str] = json.loads(zlib.decompress(payload))
+        return hits
+
+    def put_many(self, values, columns_by_date):
+        """
+        Stores the {"station_id": [...], "value": [...]} columns for each date, replacing any previous entry.
+        """
+        key = self._key(values)
+        now = time.time()
+        rows = []
+        for date_str, columns in columns_by_date.items():
+            payload = zlib.compress(json.dumps(columns, separators=(",", ":")).encode("utf-8"))
+            rows.append((*key, date_str, now, payload, len(columns["station_id"])))
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO station_values
+                (datatype, aggregation, production, period, date, fetched_at, payload, stations)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+
+
+_cache = StationValueCache()
+
+
+def is_cacheable(values):
+    # Queries with extra filters (station_id, fill, ...) are passed straight through
+    return all(field in KEY_FIELDS for field in values)
+
+
+def _group_contiguous(dates):
+    # Collapse sorted dates into inclusive (start, end) runs of consecutive days
+    runs = []
+    for date in dates:
+        if runs and date - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = date
+        else:
+            runs.append([date, date])
+    return runs
+
+
+def _records_to_columns(values, records):
+    by_date = {}
+    for item in records:
+        columns = by_date.get(item["date"])
+        if columns is None:
+            columns = by_date[item["date"]] = {"station_id": [], "value": []}
+        columns["station_id"].append(item["station_id"])
+        columns["value"].append(item["value"])
+    return by_date
+
+
+def _fetch_columns_by_date(values_list, start_date, end_date, max_workers=None):
+    # Per query: date string -> {"station_id": [...], "value": [...]}, from the cache or the network
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    date_strs = [d.strftime("%Y-%m-%d") for d in dates]
+
+    # Look up cached dates, then plan range queries for the gaps
+    cached = []
+    requests_to_make = []
+    for index, values in enumerate(values_list):
+        hits = _cache.get_many(values, date_strs) if is_cacheable(values) else {}
+        cached.append(hits)
+        missing = [d for d, d_str in zip(dates, date_strs) if d_str not in hits]
+        for run_start, run_end in _group_contiguous(missing):
+            for window_start, window_end in hcdp_client.split_date_range(run_start, run_end, hcdp_client.RANGE_CHUNK_DAYS):
+                query = dict(values, date=hcdp_client.date_filter(window_start, window_end))
+                requests_to_make.append((index, window_start, window_end, query))
+
+    # Records are split into per-date columns as they stream in, so no response is held as a record list
+    fetched = hcdp_client.map_station_data(
+        [query for *_, query in requests_to_make], _records_to_columns, max_workers=max_workers
+    )
+
+    for (index, window_start, window_end, _), by_date in zip(requests_to_make, fetched):
+        values = values_list[index]
+        # Every date in the window gets an entry, so empty days are cached too (until RECENT_TTL, see _is_fresh)
+        for i in range((window_end - window_start).days + 1):
+            by_date.setdefault((window_start + timedelta(days=i)).strftime("%Y-%m-%d"), {"station_id": [], "value": []})
+        if is_cacheable(values):
+            _cache.put_many(values, by_date)
+        cached[index].update(by_date)
+
+    return date_strs, cached
+
+
+def fetch_station_columns(values_list, start_date, end_date, max_workers=None):
+    """
+    Fetches daily station values for each query over [start_date, end_date], going to the network only for
+    dates that aren't already in the local cache.
+
+    Parameters:
+    - values_list (list[dict]): Query filters without a `date` key
+    - start_date (datetime): First day (inclusive)
+    - end_date (datetime): Last day (inclusive)
+    - max_workers (int, optional): Max concurrent requests
+
+    Returns:
+    - list[dict]: {"date": datetime64[D] array, "station_id": [...], "value": [...]} for each query, sorted by date
+    """
+    date_strs, cached = _fetch_columns_by_date(values_list, start_date, end_date, max_workers)
+    results = []
+    for hits in cached:
+        hit_dates = [d_str for d_str in date_strs if d_str in hits]
+        days = [hits[d_str] for d_str in hit_dates]
+        results.append({
+            "date": np.repeat(np.array(hit_dates, dtype="datetime64[D]"), [len(c["station_id"]) for c in days]),
+            "station_id": [sid for columns in days for sid in columns["station_id"]],
+            "value": [value for columns in days for value in columns["value"]],
+        })
+    return results
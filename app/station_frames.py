@@ -0,0 +1,60 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+import islands
+import station_metadata
+
+# Fixed categories so frames from different dates and islands concatenate without re-encoding
+ISLAND_DTYPE = pd.CategoricalDtype(list(islands.ISLAND_POLYGONS) + [islands.UNKNOWN_ISLAND])
+
+
+def columns_to_frame(columns_list, value_columns, station_frame=None):
+    """
+    Builds a typed station-value frame straight from station_cache.fetch_station_columns output.
+
+    Values are parsed with one vectorized pass per query and station coordinates/islands are joined by
+    index lookup, so no per-row dicts are built.
+
+    Parameters:
+    - columns_list (list[dict]): One {"date", "station_id", "value"} dict per query
+    - value_columns (list[str]): Output column name for each query's values
+    - station_frame (pd.DataFrame, optional): Defaults to station_metadata.get_station_frame()
+
+    Returns:
+    - pd.DataFrame: `Time` (datetime64), `station_id` (category), float32 `lat`/`lon`, `island` (category)
+      and one float32 column per query, sorted by `Time`. Stations without a known island are dropped.
+    """
+    if station_frame is None:
+        station_frame = station_metadata.get_station_frame()
+
+    if not columns_list:
+        return pd.DataFrame()
+
+    frames = []
+    for columns, name in zip(columns_list, value_columns):
+        frames.append(pd.DataFrame({
+            "Time": np.asarray(columns["date"], dtype="datetime64[D]"),
+            "station_id": np.asarray(columns["station_id"], dtype=object),
+            name: pd.to_numeric(pd.Series(columns["value"], dtype=object), errors="coerce").astype("float32"),
+        }).drop_duplicates(["Time", "station_id"], keep="last"))
+    df = reduce(lambda left, right: left.merge(right, on=["Time", "station_id"], how="outer"), frames)
+
+    positions = station_frame.index.get_indexer(df["station_id"].to_numpy())
+    island = station_frame[station_metadata.ISLAND_FIELD].to_numpy()[positions]
+    keep = (positions >= 0) & pd.notna(island)
+    positions = positions[keep]
+
+    df = df[keep]
+    result = pd.DataFrame({
+        "Time": df["Time"].to_numpy(),
+        "station_id": pd.Categorical(df["station_id"].to_numpy()),
+        "lat": station_frame["lat"].to_numpy(dtype="float32")[positions],
+        "lon": station_frame["lon"].to_numpy(dtype="float32")[positions],
+        "island": pd.Categorical(island[keep], dtype=ISLAND_DTYPE),
+    })
+    for name in value_columns:
+        result[name] = df[name].to_numpy()
+    # Stable sort keeps each date's stations in upstream order
+    return result.sort_values("Time", kind="stable", ignore_index=True)
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+import station_metadata
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class StationIndex:
+    """
+    Haversine BallTree over station coordinates for nearest-neighbour and radius lookups.
+
+    Parameters:
+    - frame (pd.DataFrame): Stations indexed by station_id with float `lat`/`lon` columns
+    """
+
+    def __init__(self, frame):
+        self.station_ids = frame.index.to_numpy()
+        self.tree = BallTree(np.radians(frame[["lat", "lon"]].to_numpy(dtype=float)), metric="haversine")
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def _to_results(self, indices, distances):
+        return [(self.station_ids[i], float(d) * EARTH_RADIUS_KM) for i, d in zip(indices, distances)]
+
+    def nearest(self, lat, lon, k=1, station_ids=None):
+        """
+        Returns the `k` closest stations as (station_id, distance_km) pairs, closest first.
+
+        If `station_ids` is given, only those stations are considered.
+        """
+        if len(self) == 0:
+            return []
+        point = np.radians([[lat, lon]])
+        if station_ids is None:
+            distances, indices = self.tree.query(point, k=min(k, len(self)))
+            return self._to_results(indices[0], distances[0])
+
+        allowed = set(station_ids)
+        # Widen the search until enough allowed stations turn up
+        n = min(len(self), max(k * 4, 16))
+        while True:
+            distances, indices = self.tree.query(point, k=n)
+            results = [r for r in self._to_results(indices[0], distances[0]) if r[0] in allowed]
+            if len(results) >= k or n == len(self):
+                return results[:k]
+            n = min(len(self), n * 4)
+
+    def within(self, lat, lon, radius_km, station_ids=None):
+        """
+        Returns every station within `radius_km` as (station_id, distance_km) pairs, closest first.
+        """
+        if len(self) == 0:
+            return []
+        indices, distances = self.tree.query_radius(
+            np.radians([[lat, lon]]), r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        results = self._to_results(indices[0], distances[0])
+        if station_ids is not None:
+            allowed = set(station_ids)
+            results = [r for r in results if r[0] in allowed]
+        return results
+
+
+_index = None
+_index_frame = None
+_index_lock = threading.Lock()
+
+
+def get_station_index():
+    """
+    Returns the index for the current station metadata, rebuilding it only when the metadata is refreshed.
+    """
+    global _index, _index_frame
+    frame = station_metadata.get_station_frame()
+    with _index_lock:
+        if _index is None or _index_frame is not frame:
+            _index = StationIndex(frame)
+            _index_frame = frame
+        return _index
@@ -0,0 +1,221 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import hcdp_client
+import islands
+
+# Seconds before the metadata is refreshed in the background
+METADATA_TTL = int(os.getenv("HCDP_METADATA_TTL", "86400"))
+# On-disk snapshot so a restarted process doesn't have to download the metadata again
+SNAPSHOT_PATH = os.getenv(
+    "HCDP_METADATA_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "station_metadata.json.gz")
+)
+
+# Fields added to every station record when the metadata loads
+ISLAND_FIELD = "island_name"
+COUNTY_FIELD = "county"
+ELEVATION_BAND_FIELD = "elevation_band"
+
+ISLAND_COUNTIES = {
+    "Hawaii (Big Island)": "Hawaii",
+    "Maui": "Maui",
+    "Molokai": "Maui",
+    "Lānai": "Maui",
+    "Kahoolawe": "Maui",
+    "Oahu": "Honolulu",
+    "Kauai": "Kauai",
+    "Niihau": "Kauai",
+}
+# Upper bounds (m) of each elevation band
+ELEVATION_BANDS = [(300, "0-300 m"), (1000, "300-1000 m"), (2000, "1000-2000 m"), (float("inf"), "2000+ m")]
+
+
+class StationMetadataStore:
+    """
+    Process-wide station metadata, loaded once and refreshed in the background after `ttl` seconds.
+
+    Callers always get the current snapshot straight away; only the very first load blocks.
+    """
+
+    def __init__(self, ttl=METADATA_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._metadata = None
+        self._frame = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    def _set(self, metadata, loaded_at):
+        frame = build_station_frame(metadata)
+        with self._lock:
+            self._metadata = metadata
+            self._frame = frame
+            self._loaded_at = loaded_at
+
+    def _load(self):
+        metadata = annotate_stations(hcdp_client.get_station_metadata())
+        loaded_at = time.time()
+        self._set(metadata, loaded_at)
+        try:
+            save_snapshot(metadata, loaded_at)
+        except OSError:
+            # The in-memory copy is enough to keep serving
+            pass
+
+    def _load_snapshot(self):
+        snapshot = load_snapshot()
+        if snapshot is None:
+            return False
+        metadata, loaded_at, boundaries = snapshot
+        # Labels from other outlines or an older lookup are redone now rather than at the next TTL refresh
+        if boundaries != islands.BOUNDARIES_FINGERPRINT or any(
+            ISLAND_FIELD not in meta for meta in metadata.values() if _has_coordinates(meta)
+        ):
+            metadata = annotate_stations(metadata)
+            try:
+                save_snapshot(metadata, loaded_at)
+            except OSError:
+                pass
+        # A stale snapshot is still served; _ensure_loaded refreshes it in the background
+        self._set(metadata, loaded_at)
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self._load()
+        except Exception:
+            # Keep serving the previous snapshot; the next call past the TTL retries
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_loaded(self):
+        if self._metadata is None:
+            with self._load_lock:
+                if self._metadata is None and not self._load_snapshot():
+                    self._load()
+        if time.time() - self._loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def get_metadata(self):
+        self._ensure_loaded()
+        return self._metadata
+
+    def get_frame(self):
+        self._ensure_loaded()
+        return self._frame
+
+    def invalidate(self):
+        with self._lock:
+            self._metadata = None
+            self._frame = None
+            self._loaded_at = 0.0
+
+
+def annotate_stations(metadata):
+    """
+    Resolves each station's island, county and elevation band once, so per-record filtering is a lookup.
+
+    Stations without coordinates are left unannotated.
+    """
+    located = [(sid, float(meta["lat"]), float(meta["lng"])) for sid, meta in metadata.items() if _has_coordinates(meta)]
+    station_islands = islands.assign_islands([lat for _, lat, _ in located], [lon for _, _, lon in located])
+    for (sid, _, _), island in zip(located, station_islands):
+        meta = metadata[sid]
+        meta[ISLAND_FIELD] = island
+        meta[COUNTY_FIELD] = ISLAND_COUNTIES.get(island)
+        meta[ELEVATION_BAND_FIELD] = _elevation_band(meta.get("elevation_m"))
+    return metadata
+
+
+def _has_coordinates(meta):
+    try:
+        return np.isfinite(float(meta["lat"])) and np.isfinite(float(meta["lng"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def _elevation_band(elevation):
+    try:
+        elevation = float(elevation)
+    except (TypeError, ValueError):
+        return None
+    for upper, label in ELEVATION_BANDS:
+        if elevation < upper:
+            return label
+    return None
+
+
+def save_snapshot(metadata, loaded_at, path=SNAPSHOT_PATH):
+    # Write to a temp file first so readers never see a partial snapshot
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"loaded_at": loaded_at, "boundaries": islands.BOUNDARIES_FINGERPRINT, "stations": metadata}, f)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """
+    Returns (metadata, loaded_at, boundaries) from the on-disk snapshot, or None if there isn't a usable one.
+
+    `boundaries` is the islands.BOUNDARIES_FINGERPRINT the stations were annotated with (None for old snapshots).
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot["stations"], snapshot["loaded_at"], snapshot.get("boundaries")
+
+
+def build_station_frame(metadata):
+    """
+    Builds a DataFrame indexed by station_id with float `lat`/`lon` columns and the precomputed island fields.
+
+    Stations without usable coordinates are dropped.
+    """
+    frame = pd.DataFrame.from_dict(metadata, orient="index")
+    frame.index.name = "station_id"
+    if frame.empty or not {"lat", "lng"}.issubset(frame.columns):
+        return pd.DataFrame(
+            {"lat": [], "lon": [], ISLAND_FIELD: [], COUNTY_FIELD: [], ELEVATION_BAND_FIELD: []},
+            index=pd.Index([], name="station_id")
+        )
+    frame["lat"] = pd.to_numeric(frame["lat"], errors="coerce")
+    frame["lon"] = pd.to_numeric(frame["lng"], errors="coerce")
+    for field in (ISLAND_FIELD, COUNTY_FIELD, ELEVATION_BAND_FIELD):
+        if field not in frame.columns:
+            frame[field] = None
+    return frame.dropna(subset=["lat", "lon"])
+
+
+_store = StationMetadataStore()
+
+
+def get_station_metadata():
+    """
+    Returns station metadata as a dict of station_id -> metadata record.
+    """
+    return _store.get_metadata()
+
+
+def get_station_frame():
+    """
+    Returns station metadata as a DataFrame indexed by station_id.
+    """
+    return _store.get_frame()
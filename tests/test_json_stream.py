@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import json_stream
+
+
+def _chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _stream(document, size, key="result"):
+    return list(json_stream.iter_array_items(_chunked(document.encode("utf-8"), size), key))
+
+
+RECORDS = [
+    {"station_id": str(i), "date": "2024-05-01", "value": i * 1.25, "name": "Hāmākua ʻōhiʻa"}
+    for i in range(2000)
+]
+DOCUMENT = json.dumps({"limit": 10000, "result": RECORDS, "offset": 0})
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1024, 64 * 1024])
+def test_chunk_sizes(size):
+    document = DOCUMENT if size > 1 else json.dumps({"result": RECORDS[:50]})
+    assert _stream(document, size) == json.loads(document)["result"]
+
+
+@pytest.mark.parametrize("split", range(1, 8))
+def test_multibyte_character_split_across_chunks(split):
+    # "ʻ" and "ā" are two bytes each and "🌴" is four, so some splits land inside a character
+    document = json.dumps({"result": [{"name": "ʻŌlaʻa ā 🌴"}]}, ensure_ascii=False).encode("utf-8")
+    start = document.index("ʻ".encode("utf-8"))
+    chunks = [document[:start + split], document[start + split:]]
+    assert list(json_stream.iter_array_items(chunks, "result")) == [{"name": "ʻŌlaʻa ā 🌴"}]
+
+
+@pytest.mark.parametrize("split", range(1, 9))
+def test_number_split_across_chunks(split):
+    document = b'{"result": [12345.678, -9e-3]}'
+    start = document.index(b"1")
+    chunks = [document[:start + split], document[start + split:]]
+    assert list(json_stream.iter_array_items(chunks, "result")) == [12345.678, -9e-3]
+
+
+def test_number_at_end_of_input_chunks():
+    chunks = [b'{"result": [1', b"2", b"3", b"]", b"}"]
+    assert list(json_stream.iter_array_items(chunks, "result")) == [123]
+
+
+@pytest.mark.parametrize("document", ['{"result": []}', '{ "result" : [ ] }', '{"limit": 1, "result": []}'])
+def test_empty_array(document):
+    assert _stream(document, 1) == []
+
+
+def test_members_before_the_array_are_skipped():
+    document = json.dumps({"meta": {"result": [0]}, "note": [1, 2], "result": [3, 4]})
+    assert _stream(document, 5) == [3, 4]
+
+
+def test_empty_chunks_are_ignored():
+    chunks = [b"", b'{"result": [', b"", b"1, 2", b"", b"]}", b""]
+    assert list(json_stream.iter_array_items(chunks, "result")) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        "",
+        "[1, 2]",
+        "{}",
+        '{"other": [1]}',
+        '{"result": 5}',
+        '{"result": [1 2]}',
+        '{"result": [1, 2}',
+        '{"result" [1]}',
+    ],
+)
+def test_malformed_input_raises(document):
+    with pytest.raises(ValueError):
+        _stream(document, 3)
+
+
+@pytest.mark.parametrize("document", ['{"result": [1, 2', '{"result": [{"a": 1}, {"a": ', '{"result": [1, 2,'])
+def test_truncated_input_raises(document):
+    with pytest.raises(ValueError):
+        _stream(document, 4)
+
+
+def test_items_are_yielded_before_the_body_ends():
+    def chunks():
+        yield b'{"result": [{"a": 1}, '
+        raise AssertionError("read past the first item")
+
+    assert next(json_stream.iter_array_items(chunks(), "result")) == {"a": 1}